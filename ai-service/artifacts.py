@@ -0,0 +1,103 @@
+"""
+Pre-generated completion artifacts
+Append-only JSONL files of {"key", "value"} records produced offline by
+pregenerate.py and loaded into memory by the service. The file name
+carries a fingerprint of the prompt, model and settings, so a template
+change starts a fresh artifact instead of serving stale content.
+"""
+
+import json
+import os
+from typing import Dict, Iterator, Optional
+
+from cache import make_key, normalize_text
+from config import ARTIFACT_DIR, CHAT_MODEL
+from prompts import (
+    REDEFINE_PROMPT_VERSION,
+    REDEFINE_SYSTEM_PROMPT,
+    REDEFINE_TEMPERATURE,
+    TIPS_PROMPT_VERSION,
+    TIPS_SYSTEM_PROMPT,
+    TIPS_TEMPERATURE,
+)
+
+
+def artifact_path(name: str, *version_parts) -> str:
+    """{ARTIFACT_DIR}/{name}-{fingerprint}.jsonl"""
+    return os.path.join(ARTIFACT_DIR, f"{name}-{make_key(*version_parts)[:16]}.jsonl")
+
+
+class Artifact:
+    """Key/value records loaded from a JSONL file, with append for checkpointing"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.values: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a partial last line
+                        continue
+                    self.values[record["key"]] = record["value"]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def append(self, key: str, value: str, **extra):
+        """Record one result and flush it to disk immediately"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        record = {"key": key, "value": value, **extra}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.values[key] = value
+
+
+# ============================================================
+# REDEFINE
+# ============================================================
+
+def redefine_artifact_path() -> str:
+    return artifact_path(
+        "redefine",
+        REDEFINE_PROMPT_VERSION,
+        REDEFINE_SYSTEM_PROMPT,
+        CHAT_MODEL,
+        REDEFINE_TEMPERATURE,
+    )
+
+
+def redefine_key(word: str, base_meaning: str, example: str) -> str:
+    """Artifact key for a redefine input"""
+    return make_key(normalize_text(word), normalize_text(base_meaning), normalize_text(example))
+
+
+# ============================================================
+# TIPS
+# ============================================================
+
+def tips_version() -> tuple:
+    """Everything that changes the text generated for a tips profile"""
+    return (TIPS_PROMPT_VERSION, TIPS_SYSTEM_PROMPT, CHAT_MODEL, TIPS_TEMPERATURE)
+
+
+def tips_artifact_path() -> str:
+    return artifact_path("tips", *tips_version())
+
+
+def tips_key(profile: Dict[str, str]) -> str:
+    """Artifact key for a bucketed tips profile"""
+    return make_key(profile)
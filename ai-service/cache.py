@@ -0,0 +1,212 @@
+"""
+Two-tier response cache
+An in-process LRU sits in front of a SQLite file shared by every worker.
+Entries expire after a TTL and each tier is capped by entry count
+(the disk tier is pruned every 100 writes). Disk access runs on one
+dedicated thread per cache, so a busy SQLite file never blocks the
+event loop; a disk error counts as a miss or a skipped write.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def make_key(*parts) -> str:
+    """Stable hash of JSON-serializable key parts"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def template_version(render: Callable[[dict], str], samples: List[dict]) -> str:
+    """Fingerprint a prompt template by rendering it with placeholder inputs
+
+    Any edit to the template text changes the fingerprint, so cache keys
+    that include it stop matching entries produced by the old template.
+    """
+    rendered = "\x00".join(render(sample) for sample in samples)
+    return hashlib.sha256(rendered.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Case- and whitespace-insensitive form of a request field"""
+    if value is None:
+        return None
+    return " ".join(value.split()).casefold()
+
+
+class ResponseCache:
+    """LRU memory tier backed by a persistent SQLite tier"""
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        ttl_seconds: float,
+        max_memory_items: int = 1024,
+        max_disk_items: int = 100_000,
+    ):
+        self.name = name
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Every SQLite call runs on this one thread, off the event loop
+        self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cache-{name}")
+        self._writes = 0
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " cache TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (cache, key))"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (cache, accessed_at)"
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached value, checking memory first, then disk"""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        try:
+            row = await self._run(self._get_disk, key, now)
+        except sqlite3.Error as e:
+            print(f"⚠️  {self.name} cache read failed, treating as a miss: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            value, expires_at = row
+            self._remember(key, expires_at, value)
+            self.counters["disk_hits"] += 1
+            return value
+
+    async def set(self, key: str, value: str):
+        """Store a value in both tiers"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+        try:
+            await self._run(self._set_disk, key, value, expires_at, now)
+        except sqlite3.Error as e:
+            print(f"⚠️  {self.name} cache write skipped: {e}")
+
+    def counter_stats(self) -> Dict[str, float]:
+        """Hit/miss counters and the memory tier size (no disk access)"""
+        with self._lock:
+            lookups = sum(self.counters[k] for k in ("memory_hits", "disk_hits", "misses"))
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+            }
+
+    async def stats(self) -> Dict[str, float]:
+        """Counters plus the current size of both tiers"""
+        stats = self.counter_stats()
+        try:
+            stats["disk_items"] = await self._run(self._count_disk)
+        except sqlite3.Error as e:
+            print(f"⚠️  {self.name} cache size unavailable: {e}")
+            stats["disk_items"] = None
+        return stats
+
+    def close(self):
+        """Finish pending disk work and release the connection"""
+        self._disk.shutdown(wait=True)
+        self._db.close()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._disk, func, *args)
+
+    # Disk tier: called only on the cache's executor thread
+
+    def _get_disk(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        row = self._db.execute(
+            "SELECT value, expires_at FROM entries WHERE cache = ? AND key = ?",
+            (self.name, key),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._db.execute("DELETE FROM entries WHERE cache = ? AND key = ?", (self.name, key))
+            return None
+        self._db.execute(
+            "UPDATE entries SET accessed_at = ? WHERE cache = ? AND key = ?",
+            (now, self.name, key),
+        )
+        return row
+
+    def _set_disk(self, key: str, value: str, expires_at: float, now: float):
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries (cache, key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (self.name, key, value, expires_at, now),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune_disk(now)
+
+    def _count_disk(self) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM entries WHERE cache = ?", (self.name,)
+        ).fetchone()[0]
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _prune_disk(self, now: float):
+        """Drop expired rows, then the least recently used rows over the cap"""
+        self._db.execute(
+            "DELETE FROM entries WHERE cache = ? AND expires_at <= ?", (self.name, now)
+        )
+        deleted = self._db.execute(
+            "DELETE FROM entries WHERE cache = ? AND key IN ("
+            " SELECT key FROM entries WHERE cache = ?"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.name, self.name, self.max_disk_items),
+        ).rowcount
+        with self._lock:
+            self.counters["disk_evictions"] += max(deleted, 0)
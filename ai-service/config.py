@@ -0,0 +1,90 @@
+"""
+Shared settings for the AI service
+Values are read from the environment (see .env) with sensible defaults
+"""
+
+import os
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Where precomputed artifacts (embedding matrices, caches) are written
+CACHE_DIR = os.getenv("AI_CACHE_DIR", os.path.join(SERVICE_DIR, ".cache"))
+
+# Pre-generated completions written by pregenerate.py
+ARTIFACT_DIR = os.getenv("AI_ARTIFACT_DIR", os.path.join(CACHE_DIR, "artifacts"))
+
+# Models
+CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Upstream OpenAI connection pool and limits
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+
+
+def endpoint_setting(name: str, endpoint: str, default: str) -> str:
+    """Read a per-endpoint override, e.g. OPENAI_TIMEOUT_EXPLAIN"""
+    return os.getenv(f"{name}_{endpoint.upper()}", default)
+
+# Response cache (in-process LRU in front of a shared SQLite file)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(CACHE_DIR, "responses.sqlite3"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+RESPONSE_CACHE_MEMORY_ITEMS = int(os.getenv("RESPONSE_CACHE_MEMORY_ITEMS", "2048"))
+RESPONSE_CACHE_DISK_ITEMS = int(os.getenv("RESPONSE_CACHE_DISK_ITEMS", "100000"))
+
+# /explain/batch
+EXPLAIN_BATCH_MAX_ITEMS = int(os.getenv("EXPLAIN_BATCH_MAX_ITEMS", "50"))
+EXPLAIN_BATCH_CONCURRENCY = int(os.getenv("EXPLAIN_BATCH_CONCURRENCY", "4"))
+
+# Rate limiting (per-user buckets refill continuously over a minute)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_USER_RPM = int(os.getenv("RATE_LIMIT_USER_RPM", "30"))
+RATE_LIMIT_USER_TPM = int(os.getenv("RATE_LIMIT_USER_TPM", "20000"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# X-User-Id / X-Forwarded-For are only trusted from these proxy addresses
+# (comma-separated) or from callers presenting AI_SERVICE_SHARED_SECRET
+# in X-Service-Token; everyone else is keyed on their own IP
+RATE_LIMIT_TRUSTED_PROXIES = {
+    addr.strip() for addr in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if addr.strip()
+}
+AI_SERVICE_SHARED_SECRET = os.getenv("AI_SERVICE_SHARED_SECRET", "")
+# Trusted hops that append to X-Forwarded-For in front of the service; the
+# client address is the entry this many places from the right (left-hand
+# entries come from the browser and are never trusted)
+RATE_LIMIT_FORWARDED_HOPS = int(os.getenv("RATE_LIMIT_FORWARDED_HOPS", "1"))
+
+# Global upstream budget, kept under the provider's own limits
+UPSTREAM_RPM = int(os.getenv("UPSTREAM_RPM", "450"))
+UPSTREAM_TPM = int(os.getenv("UPSTREAM_TPM", "180000"))
+UPSTREAM_MAX_QUEUE_WAIT = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT", "5"))
+
+# /confusables: weight of embedding similarity when blending with spelling
+CONFUSABLES_EMBEDDING_WEIGHT = float(os.getenv("CONFUSABLES_EMBEDDING_WEIGHT", "0.5"))
+# Candidates (best by trigram similarity) that get full edit-distance scoring
+CONFUSABLES_MAX_CANDIDATES = int(os.getenv("CONFUSABLES_MAX_CANDIDATES", "50"))
+
+# Lexicon for fill-in-the-blank checks: the bundled common-word list plus an
+# optional extra word list (one word per line). Only when that list is marked
+# authoritative (a full dictionary) is a miss treated as "not a word" and a
+# pure typo answered without the model; otherwise the verdict is a hint.
+LEXICON_PATH = os.getenv("LEXICON_PATH", "")
+LEXICON_AUTHORITATIVE = os.getenv("LEXICON_AUTHORITATIVE", "false").lower() == "true"
+LEXICON_MAX_DISTANCE = int(os.getenv("LEXICON_MAX_DISTANCE", "2"))
+LEXICON_VERDICT_CACHE_SIZE = int(os.getenv("LEXICON_VERDICT_CACHE_SIZE", "4096"))
+
+# Upstream resilience: total deadline per call (UPSTREAM_DEADLINE_<ENDPOINT>),
+# jittered retries, optional hedging past a latency percentile, circuit breaker
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", "20"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+UPSTREAM_RETRY_BASE = float(os.getenv("UPSTREAM_RETRY_BASE", "0.25"))
+UPSTREAM_RETRY_CAP = float(os.getenv("UPSTREAM_RETRY_CAP", "4"))
+UPSTREAM_HEDGE = os.getenv("UPSTREAM_HEDGE", "false").lower() == "true"
+UPSTREAM_HEDGE_PERCENTILE = float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "95"))
+UPSTREAM_HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Prompt layout: "prefix" puts shared instructions first and request facts
+# last (provider prompt caching); "legacy" is the original facts-first layout
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "prefix").lower()
@@ -0,0 +1,338 @@
+"""
+Compact Filipino lexicon
+A packed trie (flat arrays, children stored contiguously) over words
+from the bundled datasets and common-word list (filipino_words.txt)
+plus an optional word list (LEXICON_PATH), saved once under CACHE_DIR
+and memory-mapped by every worker. Answers "is this a word?" and "is it
+a near-miss spelling of X?" locally; a miss is only conclusive when an
+authoritative list is loaded (LEXICON_AUTHORITATIVE).
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+from array import array
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import (
+    CACHE_DIR,
+    LEXICON_AUTHORITATIVE,
+    LEXICON_MAX_DISTANCE,
+    LEXICON_PATH,
+    LEXICON_VERDICT_CACHE_SIZE,
+)
+from locks import file_lock
+
+WORDS_PATH = os.path.join(os.path.dirname(__file__), "filipino_words.txt")
+
+WORD_PATTERN = re.compile(r"[a-zñ]+(?:-[a-zñ]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words in a text, keeping hyphenated forms like mag-aral"""
+    return WORD_PATTERN.findall(str(text).casefold())
+
+
+def normalize_word(word: str) -> str:
+    words = tokenize(word)
+    return words[0] if len(words) == 1 else str(word).strip().casefold()
+
+
+class PackedTrie:
+    """Trie stored as flat arrays, one slot per node in breadth-first order
+
+    Node 0 is the root. The children of node n are the nodes
+    first_child[n] .. first_child[n] + child_count[n] - 1, sorted by label
+    (a Unicode code point). The arrays can be saved to one file and
+    memory-mapped, so worker processes share a single read-only copy.
+    """
+
+    MAGIC = b"LEXTRIE1"
+    HEADER = struct.Struct("<8sII")  # magic, node count, word count
+
+    def __init__(self, labels, first_child, child_count, terminal, size: int):
+        self.labels = labels
+        self.first_child = first_child
+        self.child_count = child_count
+        self.terminal = terminal
+        self.size = size
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "PackedTrie":
+        # Build a temporary dict trie, then flatten it breadth-first
+        root: dict = {}
+        for word in sorted(set(words)):
+            node = root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        labels, first_child, child_count = array("I"), array("I"), array("I")
+        terminal = bytearray()
+        queue: List[Tuple[str, dict]] = [("\0", root)]
+        head = 0
+        while head < len(queue):
+            label, node = queue[head]
+            children = sorted(key for key in node if key)
+            labels.append(ord(label))
+            first_child.append(len(queue))
+            child_count.append(len(children))
+            terminal.append(1 if "" in node else 0)
+            queue.extend((char, node[char]) for char in children)
+            head += 1
+        return cls(labels, first_child, child_count, terminal, sum(terminal))
+
+    def save(self, path: str):
+        """Write the arrays to path atomically"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, len(self.labels), self.size))
+            for values in (self.labels, self.first_child, self.child_count):
+                f.write(array("I", values).tobytes())
+            f.write(bytes(self.terminal))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PackedTrie"]:
+        """Memory-map a saved trie, or return None if it is missing or unreadable"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, nodes, size = cls.HEADER.unpack_from(buffer)
+            if magic != cls.MAGIC or len(buffer) != cls.HEADER.size + nodes * 13:
+                raise ValueError("bad header")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️  Ignoring unreadable lexicon cache {path}: {e}")
+            return None
+
+        view = memoryview(buffer)
+        offset = cls.HEADER.size
+        arrays = []
+        for _ in range(3):
+            arrays.append(view[offset:offset + nodes * 4].cast("I"))
+            offset += nodes * 4
+        return cls(*arrays, view[offset:offset + nodes], size)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _child(self, node: int, code: int) -> int:
+        """Child of node labelled code, or -1 (binary search over the sorted run)"""
+        first = self.first_child[node]
+        low, high = first, first + self.child_count[node]
+        while low < high:
+            mid = (low + high) // 2
+            if self.labels[mid] < code:
+                low = mid + 1
+            else:
+                high = mid
+        if low < first + self.child_count[node] and self.labels[low] == code:
+            return low
+        return -1
+
+    def __contains__(self, word: str) -> bool:
+        node = 0
+        for char in word:
+            node = self._child(node, ord(char))
+            if node < 0:
+                return False
+        return bool(self.terminal[node])
+
+    def __iter__(self) -> Iterator[str]:
+        """Words in sorted order"""
+        stack = [(0, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if self.terminal[node]:
+                yield prefix
+            start = self.first_child[node]
+            for child in reversed(range(start, start + self.child_count[node])):
+                stack.append((child, prefix + chr(self.labels[child])))
+
+    def fuzzy(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Words within max_distance edits, closest first
+
+        Depth-first walk carrying one Levenshtein row per trie level and
+        pruning branches whose row minimum already exceeds max_distance.
+        """
+        codes = [ord(char) for char in word]
+        results = []
+        first_row = list(range(len(codes) + 1))
+        stack = []
+        start = self.first_child[0]
+        for child in range(start, start + self.child_count[0]):
+            stack.append((child, chr(self.labels[child]), first_row))
+
+        while stack:
+            node, prefix, previous = stack.pop()
+            code = self.labels[node]
+            row = [previous[0] + 1]
+            for i, target in enumerate(codes, 1):
+                row.append(min(
+                    row[i - 1] + 1,
+                    previous[i] + 1,
+                    previous[i - 1] + (target != code),
+                ))
+            if self.terminal[node] and row[-1] <= max_distance:
+                results.append((prefix, row[-1]))
+            if min(row) <= max_distance:
+                start = self.first_child[node]
+                for child in range(start, start + self.child_count[node]):
+                    stack.append((child, prefix + chr(self.labels[child]), row))
+
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+
+class LexiconVerdict(NamedTuple):
+    word: str
+    valid: bool
+    # Closest known spellings (edit distance <= LEXICON_MAX_DISTANCE), best first
+    near: Tuple[str, ...]
+    distance: Optional[int]
+    # Whether a miss means "not a word" or just "not in our list"
+    authoritative: bool = False
+    # Every known spelling at the closest distance (near may be truncated)
+    closest: Tuple[str, ...] = ()
+
+    def is_typo_of(self, target: str) -> bool:
+        """True when the word is not itself a word and target is among its closest spellings"""
+        return not self.valid and normalize_word(target) in self.closest
+
+    def describe(self) -> str:
+        """One-line summary for prompts"""
+        if self.valid:
+            return f'"{self.word}" is a known Filipino word.'
+        options = ", ".join(f'"{w}"' for w in self.near)
+        if self.authoritative:
+            if self.near:
+                return f'"{self.word}" is not in the lexicon; it is a near-miss spelling of {options}.'
+            return f'"{self.word}" is not in the lexicon and is not close to any known word.'
+        if self.near:
+            return (
+                f'"{self.word}" is not in our (incomplete) word list; '
+                f'it may be a misspelling of {options}, or a valid word the list lacks.'
+            )
+        return f'"{self.word}" is not in our (incomplete) word list.'
+
+
+def words_version(words: Iterable[str]) -> str:
+    """Fingerprint of a normalized word set"""
+    return hashlib.sha256("\n".join(sorted(set(words))).encode("utf-8")).hexdigest()[:16]
+
+
+class Lexicon:
+    def __init__(self, trie: PackedTrie, version: str, authoritative: bool = False):
+        self.trie = trie
+        self.version = version
+        # True when the words come from a full dictionary, so a miss is not a word
+        self.authoritative = authoritative
+        # The fuzzy walk is pure Python; learners repeat the same misspellings
+        self._verdict = lru_cache(maxsize=LEXICON_VERDICT_CACHE_SIZE)(self._verdict)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], authoritative: bool = False) -> "Lexicon":
+        words = {normalize_word(w) for w in words if w}
+        return cls(PackedTrie.build(words), words_version(words), authoritative)
+
+    def __len__(self) -> int:
+        return len(self.trie)
+
+    def __contains__(self, word: str) -> bool:
+        return normalize_word(word) in self.trie
+
+    def words(self) -> List[str]:
+        """All words, sorted"""
+        return list(self.trie)
+
+    def check(self, word: str, max_distance: int = LEXICON_MAX_DISTANCE, limit: int = 3) -> LexiconVerdict:
+        """Validity of a submitted word and its closest known spellings (memoized)"""
+        return self._verdict(normalize_word(word), max_distance, limit)
+
+    def _verdict(self, query: str, max_distance: int, limit: int) -> LexiconVerdict:
+        if query in self.trie:
+            return LexiconVerdict(query, True, (), 0, self.authoritative)
+        near = self.trie.fuzzy(query, max_distance)
+        distance = near[0][1] if near else None
+        return LexiconVerdict(
+            query,
+            False,
+            tuple(w for w, _ in near[:limit]),
+            distance,
+            self.authoritative,
+            tuple(w for w, d in near if d == distance),
+        )
+
+    def is_typo_of(self, word: str, target: str, max_distance: int = LEXICON_MAX_DISTANCE) -> bool:
+        """True when word is not itself a word and target is among its closest spellings"""
+        return self.check(word, max_distance).is_typo_of(target)
+
+
+def dataset_words() -> List[str]:
+    """Words from the vocabulary, grammar and sentence-construction datasets"""
+    from data.grammar_core import grammar_data
+    from data.sentence_construction_core import sentence_construction_data
+    from data.vocabulary_core import vocabulary_data
+
+    words: List[str] = []
+    for item in vocabulary_data:
+        for field in ("word", "meaning", "example"):
+            words.extend(tokenize(item.get(field, "")))
+    # Explanations are partly English, so only Filipino fields are indexed
+    for item in list(grammar_data) + list(sentence_construction_data):
+        for field in ("sentence", "correctSentence", "correctAnswer"):
+            words.extend(tokenize(item.get(field, "")))
+        for field in ("choices", "words"):
+            for text in item.get(field, []) or []:
+                words.extend(tokenize(text))
+    return words
+
+
+def file_words(path: str) -> List[str]:
+    """Words from a newline-delimited word list (lines starting with # are skipped)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [w for line in f if not line.startswith("#") for w in tokenize(line)]
+
+
+# Singleton instance
+_lexicon = None
+
+def load_or_build_trie(path: str, words: Iterable[str]) -> PackedTrie:
+    """Attach to the saved trie, building and saving it first if needed"""
+    trie = PackedTrie.load(path)
+    if trie is not None:
+        return trie
+    with file_lock(path):
+        # Another worker may have built it while we waited
+        trie = PackedTrie.load(path)
+        if trie is None:
+            PackedTrie.build(words).save(path)
+            trie = PackedTrie.load(path)
+    return trie
+
+
+def get_lexicon() -> Lexicon:
+    """Get or build the lexicon"""
+    global _lexicon
+    if _lexicon is None:
+        words = dataset_words() + file_words(WORDS_PATH)
+        if LEXICON_PATH:
+            words.extend(file_words(LEXICON_PATH))
+        words = {normalize_word(w) for w in words if w}
+        authoritative = bool(LEXICON_PATH) and LEXICON_AUTHORITATIVE
+        # A verdict's wording depends on authority, so it is part of the version
+        version = words_version(words) + ("-a" if authoritative else "")
+        path = os.path.join(CACHE_DIR, f"lexicon-{version}.trie")
+        try:
+            trie = load_or_build_trie(path, words)
+        except OSError as e:
+            print(f"⚠️  Lexicon cache unavailable ({e}); building in memory")
+            trie = None
+        _lexicon = Lexicon(trie or PackedTrie.build(words), version, authoritative)
+    return _lexicon
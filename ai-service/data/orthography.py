@@ -0,0 +1,291 @@
+"""
+Local orthographic confusables
+Finds look-alike words without network calls: a BK-tree over edit
+distance and a character-trigram inverted index produce candidates,
+which are scored by weighted edit distance, trigram overlap and shared
+Filipino affixes (e.g. masigasig / masikap, nag- / -um- variants)
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import CONFUSABLES_MAX_CANDIDATES
+
+# Longest first so "makipag" wins over "mag" and "ma"
+PREFIXES = tuple(sorted((
+    "makipag", "nakipag", "pakikipag", "pinaka", "magpa", "nagpa", "ipag",
+    "maka", "naka", "paki", "mag", "nag", "pag", "mang", "nang", "pang",
+    "man", "nan", "pan", "ipa", "taga", "tag", "ika", "ma", "na", "pa",
+    "ka", "i",
+), key=len, reverse=True))
+INFIXES = ("um", "in")
+SUFFIXES = ("han", "hin", "nan", "an", "in")
+
+# Minimum root length left after stripping an affix
+MIN_ROOT = 3
+
+# Substitutions learners commonly confuse cost less than a full edit
+CHEAP_SUBSTITUTIONS = {
+    frozenset(pair): 0.5
+    for pair in (("o", "u"), ("e", "i"), ("d", "r"), ("s", "z"), ("k", "c"), ("p", "f"), ("b", "v"))
+}
+
+EDIT_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.3
+AFFIX_WEIGHT = 0.2
+
+
+def normalize_word(word: str) -> str:
+    return word.strip().strip(".,;:!?\"'()").casefold()
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Plain edit distance (a metric, as the BK-tree requires)
+
+    Bit-parallel (Myers/Hyyrö): one column of the DP matrix is held as
+    bit vectors of +1/-1 vertical deltas, so each character of b costs a
+    few integer operations instead of a loop over a.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def weighted_edit_distance(a: str, b: str) -> float:
+    """Edit distance with cheap look-alike substitutions and adjacent transpositions"""
+    rows, cols = len(a) + 1, len(b) + 1
+    d = [[0.0] * cols for _ in range(rows)]
+    for i in range(rows):
+        d[i][0] = float(i)
+    for j in range(cols):
+        d[0][j] = float(j)
+    for i in range(1, rows):
+        for j in range(1, cols):
+            ca, cb = a[i - 1], b[j - 1]
+            substitution = 0.0 if ca == cb else CHEAP_SUBSTITUTIONS.get(frozenset((ca, cb)), 1.0)
+            d[i][j] = min(
+                d[i - 1][j] + 1,
+                d[i][j - 1] + 1,
+                d[i - 1][j - 1] + substitution,
+            )
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+def trigrams(word: str) -> Counter:
+    padded = f"$${word}$$"
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def dice(a: Counter, b: Counter) -> float:
+    """Dice coefficient of two trigram multisets"""
+    return 2 * sum((a & b).values()) / (sum(a.values()) + sum(b.values()))
+
+
+def affixes(word: str) -> Tuple[str, str, str, str]:
+    """Split a word into (prefix, infix, suffix, root), e.g. "kumain" -> ("", "um", "", "kain")"""
+    root = word.replace("-", "")
+    prefix = infix = suffix = ""
+
+    for candidate in PREFIXES:
+        if word.startswith(candidate) and len(root) - len(candidate) >= MIN_ROOT:
+            prefix = candidate
+            root = root[len(candidate):]
+            break
+
+    if not prefix and len(root) > 2 and root[0] not in "aeiou":
+        for candidate in INFIXES:
+            if root[1:3] == candidate and len(root) - 2 >= MIN_ROOT:
+                infix = candidate
+                root = root[0] + root[3:]
+                break
+
+    for candidate in SUFFIXES:
+        if root.endswith(candidate) and len(root) - len(candidate) >= MIN_ROOT:
+            suffix = candidate
+            root = root[:-len(candidate)]
+            break
+
+    return prefix, infix, suffix, root
+
+
+def affix_similarity(a: str, b: str) -> float:
+    """1.0 for the same root, 0.5 for a shared affix, else 0"""
+    pa, ia, sa, root_a = affixes(a)
+    pb, ib, sb, root_b = affixes(b)
+    if root_a == root_b:
+        return 1.0
+    if (pa and pa == pb) or (ia and ia == ib) or (sa and sa == sb):
+        return 0.5
+    return 0.0
+
+
+class BKTree:
+    """Burkhard-Keller tree for edit-distance range queries"""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """All words within max_distance edits"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            candidate, children = stack.pop()
+            distance = levenshtein(word, candidate)
+            if distance <= max_distance:
+                found.append((candidate, distance))
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in children.items() if low <= d <= high)
+        return found
+
+
+class TrigramIndex:
+    """Inverted index from character trigrams to words"""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.postings: Dict[str, Set[str]] = {}
+        self.grams: Dict[str, Counter] = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        grams = trigrams(word)
+        self.grams[word] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(word)
+
+    def search(self, word: str, min_similarity: float = 0.2) -> List[Tuple[str, float]]:
+        """Words whose trigram Dice coefficient with word is at least min_similarity"""
+        grams = trigrams(word)
+        shared: Counter = Counter()
+        for gram, count in grams.items():
+            postings = self.postings.get(gram, ())
+            if count == 1:
+                # min(1, n) is 1 for every posting, so count them in bulk
+                shared.update(postings)
+                continue
+            for candidate in postings:
+                shared[candidate] += min(count, self.grams[candidate][gram])
+        total = sum(grams.values())
+        results = []
+        for candidate, overlap in shared.items():
+            similarity = 2 * overlap / (total + sum(self.grams[candidate].values()))
+            if similarity >= min_similarity:
+                results.append((candidate, similarity))
+        return results
+
+
+class OrthographicEngine:
+    """Ranks vocabulary words that look or inflect like a query word
+
+    Candidates come from the trigram index, the BK-tree (within
+    max_distance edits) and same-root words; only the max_candidates
+    with the best trigram similarity reach the costlier edit scoring.
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2, max_candidates: int = 50):
+        self.words = {normalize_word(w): w for w in words}
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.tree = BKTree(self.words)
+        self.trigrams = TrigramIndex(self.words)
+        self.by_root: Dict[str, List[str]] = {}
+        for word in self.words:
+            self.by_root.setdefault(affixes(word)[3], []).append(word)
+
+    def score(self, a: str, b: str, trigram_similarity: Optional[float] = None) -> float:
+        """Blend of weighted edit, trigram and affix similarity in [0, 1]"""
+        a, b = normalize_word(a), normalize_word(b)
+        edit = 1 - min(1.0, weighted_edit_distance(a, b) / max(len(a), len(b), 1))
+        if trigram_similarity is None:
+            trigram_similarity = dice(trigrams(a), trigrams(b))
+        return (
+            EDIT_WEIGHT * edit
+            + TRIGRAM_WEIGHT * trigram_similarity
+            + AFFIX_WEIGHT * affix_similarity(a, b)
+        )
+
+    def candidates(self, word: str) -> Dict[str, float]:
+        """Up to max_candidates words mapped to their trigram similarity, best first"""
+        query = normalize_word(word)
+        found: Dict[str, float] = dict(self.trigrams.search(query))
+        query_grams = trigrams(query)
+        extra = [candidate for candidate, _ in self.tree.search(query, self.max_distance)]
+        extra.extend(self.by_root.get(affixes(query)[3], ()))
+        for candidate in extra:
+            if candidate not in found:
+                found[candidate] = dice(query_grams, self.trigrams.grams[candidate])
+        found.pop(query, None)
+        best = sorted(found.items(), key=lambda item: (-item[1], item[0]))[:self.max_candidates]
+        return dict(best)
+
+    def scored(self, word: str) -> Dict[str, float]:
+        """Every candidate, in original spelling, mapped to its score"""
+        query = normalize_word(word)
+        return {
+            self.words[candidate]: self.score(query, candidate, trigram_similarity)
+            for candidate, trigram_similarity in self.candidates(query).items()
+        }
+
+    def similar(self, word: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """Best (word, score) pairs, best first"""
+        ranked = sorted(self.scored(word).items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+
+# Singleton instance
+_orthographic_engine = None
+
+def get_orthographic_engine() -> OrthographicEngine:
+    """Get or build the engine over the vocabulary"""
+    global _orthographic_engine
+    if _orthographic_engine is None:
+        from data.vocabulary_store import get_vocabulary_store
+        _orthographic_engine = OrthographicEngine(
+            get_vocabulary_store().words(),
+            max_candidates=CONFUSABLES_MAX_CANDIDATES,
+        )
+    return _orthographic_engine
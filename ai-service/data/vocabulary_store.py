@@ -0,0 +1,117 @@
+"""
+Indexed in-memory vocabulary
+Loads vocabulary_data once into compact records with hash indexes by word
+and id, plus secondary indexes on difficulty, category and frequency band
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (exclusive) of each frequency band; words without a
+# frequency fall into "unknown"
+FREQUENCY_BANDS: Tuple[Tuple[str, float], ...] = (
+    ("rare", 0.0001),
+    ("uncommon", 0.0003),
+    ("common", float("inf")),
+)
+_BAND_LIMITS = [limit for _, limit in FREQUENCY_BANDS]
+
+
+def frequency_band(frequency: Optional[float]) -> str:
+    """Name of the band a frequency falls into"""
+    if frequency is None:
+        return "unknown"
+    return FREQUENCY_BANDS[bisect_right(_BAND_LIMITS, frequency)][0]
+
+
+class VocabularyEntry:
+    """One vocabulary word"""
+
+    __slots__ = ("id", "word", "meaning", "example", "difficulty", "category", "frequency")
+
+    def __init__(self, id, word, meaning, example, difficulty, category, frequency=None):
+        self.id = id
+        self.word = word
+        self.meaning = meaning
+        self.example = example
+        self.difficulty = difficulty
+        self.category = category
+        self.frequency = frequency
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VocabularyEntry":
+        return cls(
+            data["id"],
+            data["word"],
+            data["meaning"],
+            data["example"],
+            data.get("difficulty"),
+            data.get("category"),
+            data.get("frequency"),
+        )
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"VocabularyEntry(id={self.id!r}, word={self.word!r})"
+
+
+class VocabularyStore:
+    """Vocabulary entries with O(1) lookups"""
+
+    def __init__(self, records: Iterable[dict]):
+        self.entries: List[VocabularyEntry] = [VocabularyEntry.from_dict(r) for r in records]
+
+        self._by_word: Dict[str, VocabularyEntry] = {}
+        self._by_id: Dict[int, VocabularyEntry] = {}
+        self._by_difficulty: Dict[str, List[VocabularyEntry]] = {}
+        self._by_category: Dict[str, List[VocabularyEntry]] = {}
+        self._by_band: Dict[str, List[VocabularyEntry]] = {}
+
+        for entry in self.entries:
+            # First occurrence wins, matching the old linear scans
+            self._by_word.setdefault(entry.word, entry)
+            self._by_id.setdefault(entry.id, entry)
+            self._by_difficulty.setdefault(entry.difficulty, []).append(entry)
+            self._by_category.setdefault(entry.category, []).append(entry)
+            self._by_band.setdefault(frequency_band(entry.frequency), []).append(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._by_word
+
+    def get(self, word: str) -> Optional[VocabularyEntry]:
+        """Entry for a word"""
+        return self._by_word.get(word)
+
+    def get_by_id(self, word_id: int) -> Optional[VocabularyEntry]:
+        """Entry for a vocabulary id"""
+        return self._by_id.get(word_id)
+
+    def words(self) -> List[str]:
+        """Distinct words, in dataset order"""
+        return list(self._by_word)
+
+    def with_difficulty(self, difficulty: str) -> List[VocabularyEntry]:
+        return self._by_difficulty.get(difficulty, [])
+
+    def in_category(self, category: str) -> List[VocabularyEntry]:
+        return self._by_category.get(category, [])
+
+    def in_frequency_band(self, band: str) -> List[VocabularyEntry]:
+        return self._by_band.get(band, [])
+
+
+# Singleton instance
+_vocabulary_store = None
+
+def get_vocabulary_store() -> VocabularyStore:
+    """Get or load the shared vocabulary store"""
+    global _vocabulary_store
+    if _vocabulary_store is None:
+        from data.vocabulary_core import vocabulary_data
+        _vocabulary_store = VocabularyStore(vocabulary_data)
+    return _vocabulary_store
@@ -0,0 +1,256 @@
+"""
+Local stand-in for the OpenAI API
+Implements /v1/chat/completions (plain and streaming) and /v1/embeddings
+with configurable latency, token rate and error rate, deterministic
+embeddings and a simulated prompt-prefix cache (reported as
+usage.prompt_tokens_details.cached_tokens), so the AI service can be
+benchmarked offline.
+
+Run it, then point the service at it:
+    python -m loadtest.fake_openai --port 9100 --latency-median 0.8
+    OPENAI_BASE_URL=http://localhost:9100/v1 OPENAI_API_KEY=sk-fake python main.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "ang salita ay nangangahulugang tama dahil ayon sa kahulugan mali ang "
+    "napili sapagkat iba ang konteksto tandaan basahin muli ang pangungusap "
+    "bago sumagot gamitin ang context clues at huwag magmadali"
+).split()
+
+
+@dataclass
+class FakeSettings:
+    latency_median: float = 0.8   # seconds before the first token / response
+    latency_sigma: float = 0.4    # lognormal shape; 0 gives a fixed latency
+    tokens_per_second: float = 60.0
+    completion_tokens: int = 120
+    error_rate: float = 0.0
+    error_status: int = 500
+    embedding_dim: int = 1536
+    embedding_latency: float = 0.05
+    # Prompt prefixes are cached in increments of this many tokens once a
+    # prompt reaches the minimum (OpenAI: 1024 and 128)
+    prompt_cache_min_tokens: int = 1024
+    prompt_cache_increment: int = 128
+
+
+settings = FakeSettings()
+stats: Counter = Counter()
+seen_prefixes: set = set()
+app = FastAPI(title="Fake OpenAI")
+
+
+def sample_latency() -> float:
+    if settings.latency_sigma <= 0:
+        return settings.latency_median
+    return random.lognormvariate(np.log(settings.latency_median), settings.latency_sigma)
+
+
+def seeded_rng(text: str) -> np.random.Generator:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed)
+
+
+def fake_embedding(text: str) -> list:
+    """Deterministic unit vector for a text"""
+    vector = seeded_rng(text).standard_normal(settings.embedding_dim)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+def fake_tokens(prompt: str) -> list:
+    """Deterministic completion tokens for a prompt"""
+    rng = seeded_rng(prompt)
+    return [WORDS[i] + " " for i in rng.integers(0, len(WORDS), settings.completion_tokens)]
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def cached_prompt_tokens(prompt: str) -> int:
+    """Tokens of the longest previously seen prompt prefix; remembers this prompt's prefixes"""
+    step = settings.prompt_cache_increment * 4  # count_tokens uses 4 chars per token
+    if count_tokens(prompt) < settings.prompt_cache_min_tokens or step <= 0:
+        return 0
+    cached = 0
+    first = max(step, settings.prompt_cache_min_tokens * 4 // step * step)
+    for end in range(first, len(prompt) + 1, step):
+        digest = hashlib.sha256(prompt[:end].encode("utf-8")).digest()
+        if digest in seen_prefixes:
+            cached = end // 4
+        else:
+            seen_prefixes.add(digest)
+    return cached
+
+
+def maybe_fail(route: str):
+    if settings.error_rate and random.random() < settings.error_rate:
+        stats[f"{route}_errors"] += 1
+        return JSONResponse(
+            {"error": {"message": "Injected failure", "type": "fake_error"}},
+            status_code=settings.error_status,
+        )
+    return None
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["chat_completions"] += 1
+
+    failure = maybe_fail("chat_completions")
+    if failure is not None:
+        return failure
+
+    prompt = "\n".join(f'{m.get("role")}: {m.get("content", "")}' for m in body.get("messages", []))
+    tokens = fake_tokens(prompt)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "gpt-4o-mini")
+    cached = cached_prompt_tokens(prompt)
+    usage = {
+        "prompt_tokens": count_tokens(prompt),
+        "completion_tokens": len(tokens),
+        "total_tokens": count_tokens(prompt) + len(tokens),
+        "prompt_tokens_details": {"cached_tokens": cached},
+    }
+    stats["prompt_tokens"] += usage["prompt_tokens"]
+    stats["cached_tokens"] += cached
+    stats["completion_tokens"] += len(tokens)
+
+    await asyncio.sleep(sample_latency())
+
+    if not body.get("stream"):
+        await asyncio.sleep(len(tokens) / settings.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    stats["chat_streams"] += 1
+
+    async def events():
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / settings.tokens_per_second)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        done = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        if (body.get("stream_options") or {}).get("include_usage"):
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    stats["embeddings"] += 1
+
+    failure = maybe_fail("embeddings")
+    if failure is not None:
+        return failure
+
+    inputs = body["input"]
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    stats["embedded_texts"] += len(inputs)
+
+    await asyncio.sleep(settings.embedding_latency)
+    tokens = sum(count_tokens(text) for text in inputs)
+    return {
+        "object": "list",
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+            for i, text in enumerate(inputs)
+        ],
+        "model": body.get("model", "text-embedding-3-small"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Upstream call counts since start (or the last reset)"""
+    return dict(stats)
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    stats.clear()
+    seen_prefixes.clear()
+    return {"reset": True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-median", type=float, default=settings.latency_median)
+    parser.add_argument("--latency-sigma", type=float, default=settings.latency_sigma)
+    parser.add_argument("--tokens-per-second", type=float, default=settings.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=settings.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate)
+    parser.add_argument("--error-status", type=int, default=settings.error_status)
+    parser.add_argument("--embedding-dim", type=int, default=settings.embedding_dim)
+    parser.add_argument("--embedding-latency", type=float, default=settings.embedding_latency)
+    parser.add_argument("--prompt-cache-min-tokens", type=int, default=settings.prompt_cache_min_tokens)
+    parser.add_argument("--prompt-cache-increment", type=int, default=settings.prompt_cache_increment)
+    parser.add_argument("--seed", type=int, default=None, help="Seed latency/error sampling")
+    args = parser.parse_args()
+
+    for field in FakeSettings.__dataclass_fields__:
+        setattr(settings, field, getattr(args, field))
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Load driver for the AI service
+Sends a weighted mix of /explain, /tips, /redefine and /confusables
+requests at each concurrency level and reports throughput, latency
+percentiles, token usage per upstream call (prompt, cached, completion)
+for the service's PROMPT_VARIANT, and (when pointed at the fake server)
+upstream call counts. Run once per variant to compare layouts.
+
+Each virtual user sends its own X-User-Id, authenticated with the
+service's AI_SERVICE_SHARED_SECRET, so per-user rate limits apply per
+virtual user rather than throttling the whole run as one caller.
+
+    python -m loadtest.run --concurrency 1,8,32 --duration 20 \\
+        --fake-url http://localhost:9100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from data.vocabulary_store import get_vocabulary_store
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+MODULES = ["vocabulary", "grammar", "sentence-construction", "reading-comprehension"]
+
+
+def explain_payload(rng: random.Random) -> Tuple[str, dict]:
+    entries = get_vocabulary_store().entries
+    entry, wrong = rng.sample(entries, 2)
+    if rng.random() < 0.5:
+        return "/explain", {
+            "mode": "quiz",
+            "word": entry.word,
+            "correct": entry.meaning,
+            "selected": wrong.meaning,
+        }
+    return "/explain", {
+        "mode": "fill-blanks",
+        "word": entry.word,
+        "correct": entry.word,
+        "selected": wrong.word,
+    }
+
+
+def tips_payload(rng: random.Random) -> Tuple[str, dict]:
+    return "/tips", {
+        "score": rng.randint(0, 100),
+        "missedLowFreq": rng.randint(0, 5),
+        "similarChoiceErrors": rng.randint(0, 5),
+        "lastDifficulty": rng.choice(DIFFICULTIES),
+        "module": rng.choice(MODULES),
+    }
+
+
+def redefine_payload(rng: random.Random) -> Tuple[str, dict]:
+    entry = rng.choice(get_vocabulary_store().entries)
+    return "/redefine", {
+        "word": entry.word,
+        "baseMeaning": entry.meaning,
+        "example": entry.example,
+    }
+
+
+def confusables_payload(rng: random.Random) -> Tuple[str, dict]:
+    entry = rng.choice(get_vocabulary_store().entries)
+    return "/confusables", {"word": entry.word, "topK": 3}
+
+
+PAYLOADS: Dict[str, Callable[[random.Random], Tuple[str, dict]]] = {
+    "explain": explain_payload,
+    "tips": tips_payload,
+    "redefine": redefine_payload,
+    "confusables": confusables_payload,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PAYLOADS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def upstream_stats(client: httpx.AsyncClient, fake_url: Optional[str]) -> Dict[str, int]:
+    if not fake_url:
+        return {}
+    try:
+        return (await client.get(f"{fake_url}/stats")).json()
+    except httpx.HTTPError:
+        return {}
+
+
+async def service_health(client: httpx.AsyncClient) -> dict:
+    try:
+        return (await client.get("/health")).json()
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+
+def usage_delta(before: dict, after: dict) -> Dict[str, Dict[str, int]]:
+    """Token totals accumulated between two /health snapshots, per endpoint"""
+    delta = {}
+    for endpoint, totals in after.get("token_usage", {}).items():
+        previous = before.get("token_usage", {}).get(endpoint, {})
+        delta[endpoint] = {
+            kind: totals.get(kind, 0) - previous.get(kind, 0)
+            for kind in ("calls", "prompt", "cached", "completion")
+        }
+    return delta
+
+
+async def run_level(
+    target: str,
+    fake_url: Optional[str],
+    concurrency: int,
+    duration: float,
+    mix: Dict[str, float],
+    seed: int,
+    service_token: str = "",
+) -> dict:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=120, limits=limits) as client:
+        before = await upstream_stats(client, fake_url)
+        health_before = await service_health(client)
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1000 + worker_id)
+            headers = {"X-User-Id": f"loadtest-{seed}-{worker_id}"}
+            if service_token:
+                headers["X-Service-Token"] = service_token
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                path, payload = PAYLOADS[name](rng)
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=payload, headers=headers)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies[name].append(time.perf_counter() - started)
+                if not ok:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        after = await upstream_stats(client, fake_url)
+        health_after = await service_health(client)
+
+    return {
+        "concurrency": concurrency,
+        "variant": health_after.get("prompt_variant", "unknown"),
+        "tokens": usage_delta(health_before, health_after),
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "errors": errors,
+        "upstream": {key: after.get(key, 0) - before.get(key, 0) for key in after},
+    }
+
+
+def print_report(result: dict):
+    all_latencies = [v for values in result["latencies"].values() for v in values]
+    total = len(all_latencies)
+    print(f"\n=== concurrency {result['concurrency']}, prompt variant {result['variant']} ===")
+    print(
+        f"requests: {total}  throughput: {total / result['elapsed']:.1f} req/s  "
+        f"errors: {sum(result['errors'].values())}"
+    )
+    print(f"{'endpoint':<14}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    rows = sorted(result["latencies"].items()) + [("all", all_latencies)]
+    for name, values in rows:
+        errors = sum(result["errors"].values()) if name == "all" else result["errors"][name]
+        print(
+            f"{name:<14}{len(values):>8}"
+            f"{percentile(values, 50) * 1000:>10.1f}"
+            f"{percentile(values, 95) * 1000:>10.1f}"
+            f"{percentile(values, 99) * 1000:>10.1f}"
+            f"{errors:>8}"
+        )
+    tokens = {name: usage for name, usage in sorted(result["tokens"].items()) if usage["calls"]}
+    if tokens:
+        print(f"{'tokens/call':<14}{'calls':>8}{'prompt':>10}{'cached':>10}{'cached %':>10}{'output':>8}")
+        for name, usage in tokens.items():
+            calls = usage["calls"]
+            print(
+                f"{name:<14}{calls:>8}"
+                f"{usage['prompt'] / calls:>10.1f}"
+                f"{usage['cached'] / calls:>10.1f}"
+                f"{100 * usage['cached'] / usage['prompt'] if usage['prompt'] else 0:>10.1f}"
+                f"{usage['completion'] / calls:>8.1f}"
+            )
+    if result["upstream"]:
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(result["upstream"].items()))
+        print(f"upstream: {calls}")
+
+
+async def main_async(args):
+    for concurrency in args.concurrency:
+        result = await run_level(
+            args.target,
+            args.fake_url,
+            concurrency,
+            args.duration,
+            args.mix,
+            args.seed,
+            args.service_token,
+        )
+        print_report(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI service")
+    parser.add_argument("--target", default="http://localhost:8001")
+    parser.add_argument("--fake-url", default=None, help="Fake OpenAI server, for upstream call counts")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(x) for x in v.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("explain=4,tips=1,redefine=1,confusables=2"),
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--service-token",
+        default=os.getenv("AI_SERVICE_SHARED_SECRET", ""),
+        help="Shared secret that lets the per-user X-User-Id headers be trusted",
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
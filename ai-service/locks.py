@@ -0,0 +1,51 @@
+"""
+Cross-process file locks
+Serializes builds of shared on-disk artifacts (embedding matrices, the
+lexicon trie) so that when several workers start together one builds
+and the others wait and then attach to the result. Advisory locks via
+fcntl; on platforms without it the lock is a no-op.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def acquire(path: str) -> IO:
+    """Block until the lock for path (path + ".lock") is held"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(f"{path}.lock", "a")
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def release(handle: IO):
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+
+
+@contextmanager
+def file_lock(path: str):
+    handle = acquire(path)
+    try:
+        yield
+    finally:
+        release(handle)
+
+
+@asynccontextmanager
+async def async_file_lock(path: str):
+    """file_lock that waits in a thread instead of blocking the event loop"""
+    handle = await asyncio.to_thread(acquire, path)
+    try:
+        yield
+    finally:
+        release(handle)
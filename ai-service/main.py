@@ -1,30 +1,68 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Awaitable, Callable, Dict, Literal, Optional, List
+import asyncio
+import json
 import os
-import sys
+import time
 from dotenv import load_dotenv
 
 # Load environment variables FIRST
 load_dotenv()
 
-# Verify OpenAI API key exists
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key or api_key == "your_openai_api_key_here":
-    print("❌ ERROR: OPENAI_API_KEY not set in .env file")
-    print("Please edit ai-service/.env and add your OpenAI API key")
-    sys.exit(1)
-
-# Import OpenAI after env check
-try:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=api_key)
-    print("✅ OpenAI client initialized successfully")
-except Exception as e:
-    print(f"❌ ERROR initializing OpenAI client: {e}")
-    print("\nTry running: pip install --upgrade openai httpx")
-    sys.exit(1)
+# The OpenAI client itself is created on first use (or during warm-up)
+import openai_client
+from artifacts import (
+    Artifact,
+    redefine_artifact_path,
+    redefine_key,
+    tips_artifact_path,
+    tips_key,
+    tips_version,
+)
+from cache import ResponseCache, make_key, normalize_text
+from config import (
+    CHAT_MODEL,
+    CONFUSABLES_EMBEDDING_WEIGHT,
+    EMBEDDING_MODEL,
+    EXPLAIN_BATCH_CONCURRENCY,
+    EXPLAIN_BATCH_MAX_ITEMS,
+    RESPONSE_CACHE_DISK_ITEMS,
+    RESPONSE_CACHE_MEMORY_ITEMS,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL,
+)
+from data.lexicon import LexiconVerdict, get_lexicon
+from data.orthography import get_orthographic_engine
+from data.vocabulary_store import VocabularyEntry, get_vocabulary_store
+from metrics import (
+    CACHE_HIT_RATIO,
+    CACHE_LOOKUPS,
+    REGISTRY,
+    UPSTREAM_FALLBACKS,
+    REQUEST_ERRORS,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+)
+from prompts import (
+    EXPLAIN_PROMPT_VERSION,
+    EXPLAIN_SYSTEM_PROMPT,
+    EXPLAIN_TEMPERATURE,
+    PROMPT_VARIANT,
+    REDEFINE_TEMPERATURE,
+    TIPS_TEMPERATURE,
+    explanation_messages,
+    redefine_messages,
+    tips_messages,
+    tips_profile,
+)
+from ratelimit import estimate_tokens, limiter, rate_limit
+import resilience
+from resilience import UpstreamUnavailable
+from rag.embeddings import load_or_build_matrix
+from rag.vector_store import VectorStore
 
 # Initialize FastAPI
 app = FastAPI(
@@ -43,6 +81,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paths of the registered routes, collected on the first request
+_route_paths: Optional[frozenset] = None
+
+def route_paths() -> frozenset:
+    global _route_paths
+    if _route_paths is None:
+        _route_paths = frozenset(route.path for route in app.routes)
+    return _route_paths
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-endpoint latency, in-flight and error metrics"""
+    endpoint = request.url.path if request.url.path in route_paths() else "other"
+    REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        if status >= 400:
+            REQUEST_ERRORS.inc(endpoint=endpoint, status=str(status))
+
 # ============================================================
 # REQUEST/RESPONSE MODELS
 # ============================================================
@@ -56,6 +120,17 @@ class ExplainRequest(BaseModel):
 class ExplainResponse(BaseModel):
     explanation: str
 
+class ExplainBatchRequest(BaseModel):
+    items: List[ExplainRequest] = Field(..., max_length=EXPLAIN_BATCH_MAX_ITEMS)
+
+class ExplainBatchItem(BaseModel):
+    ok: bool
+    explanation: Optional[str] = None
+    error: Optional[str] = None
+
+class ExplainBatchResponse(BaseModel):
+    results: List[ExplainBatchItem]
+
 class TipsRequest(BaseModel):
     score: int
     missedLowFreq: int
@@ -76,7 +151,9 @@ class RedefineResponse(BaseModel):
 
 class ConfusablesRequest(BaseModel):
     word: str
-    topK: Optional[int] = 3
+    topK: int = Field(3, ge=1, le=50)
+    # "blend" mixes in embedding scores only when the word's vector is already local
+    method: Literal["orthographic", "embedding", "blend"] = "blend"
 
 class ConfusableWord(BaseModel):
     word: str
@@ -95,86 +172,264 @@ class HealthResponse(BaseModel):
 # HELPER FUNCTIONS
 # ============================================================
 
-def get_vocabulary_entry(word: str):
-    """Load vocabulary data and find entry"""
-    try:
-        from data.vocabulary_core import vocabulary_data
-        return next((v for v in vocabulary_data if v["word"] == word), None)
-    except ImportError:
-        print("⚠️  Warning: vocabulary_core.py not found")
+def get_vocabulary_entry(word: str) -> Optional[VocabularyEntry]:
+    """Find a vocabulary entry by word"""
+    return get_vocabulary_store().get(word)
+
+# Vocabulary embeddings, built during warm-up (or on first use)
+vocabulary_index: Optional[VectorStore] = None
+_vocabulary_index_lock = asyncio.Lock()
+
+async def embed_vocabulary(texts: List[str]) -> List[List[float]]:
+    """Embed vocabulary words for the confusables index"""
+    return await openai_client.embed_texts("confusables", texts)
+
+async def get_vocabulary_index() -> VectorStore:
+    """Load the vocabulary embedding matrix from disk, embedding it on a cache miss"""
+    global vocabulary_index
+    async with _vocabulary_index_lock:
+        if vocabulary_index is None:
+            words = get_vocabulary_store().words()
+            matrix = await load_or_build_matrix("vocabulary", words, EMBEDDING_MODEL, embed_vocabulary)
+            vocabulary_index = VectorStore(words, matrix)
+            mark_component("embeddings", True, f"{len(vocabulary_index)} vectors")
+    return vocabulary_index
+
+# ============================================================
+# COMPLETION REQUESTS
+# ============================================================
+
+def explain_messages(request: ExplainRequest, verdict: Optional[LexiconVerdict]) -> List[dict]:
+    """Chat messages for an explain request"""
+    entry = get_vocabulary_entry(request.word)
+    definition = entry.meaning if entry else request.correct
+    example = entry.example if entry else ""
+
+    return explanation_messages({
+        "mode": request.mode,
+        "word": request.word,
+        "correct": request.correct,
+        "selected": request.selected,
+        "definition": definition,
+        "example": example,
+        "lexicon": verdict.describe() if verdict else "",
+    })
+
+async def lexicon_verdict(request: ExplainRequest) -> Optional[LexiconVerdict]:
+    """Local validity check of a fill-in-the-blank submission
+
+    Computed once per request (the trie walk runs off the event loop and
+    is memoized per word) and shared by the typo shortcut and the prompt.
+    """
+    if request.mode != "fill-blanks" or not request.selected:
+        return None
+    return await asyncio.to_thread(lambda: get_lexicon().check(request.selected))
+
+def typo_explanation(request: ExplainRequest, verdict: Optional[LexiconVerdict]) -> Optional[str]:
+    """Templated explanation when the submission is only a misspelling of the answer
+
+    Needs an authoritative lexicon: with a partial word list, a miss may
+    still be a valid word, so the model judges it instead.
+    """
+    if verdict is None or not verdict.authoritative or not verdict.is_typo_of(request.correct):
         return None
 
-def explanation_prompt(data: dict) -> str:
-    """Generate explanation prompt"""
-    mode = data["mode"]
-    word = data["word"]
-    correct = data["correct"]
-    selected = data.get("selected")
-    definition = data["definition"]
-    example = data["example"]
-
-    if mode == "quiz":
-        return f"""You are a helpful Filipino language coach for UPCAT prep.
-
-Facts you MUST use:
-- Word: {word}
-- Correct meaning: {correct}
-- Official definition: {definition}
-- Example sentence: {example}
-- Student selected: {selected}
-
-Task:
-Explain why the correct meaning is correct and why the selected choice is wrong.
-
-Output 4 bullets:
-1) Why the correct answer is correct (use the definition).
-2) Why the selected choice is wrong (explain the difference or trap).
-3) A quick vocabulary/grammar note (one sentence).
-4) A time-pressure tip (one sentence)."""
-
-    return f"""You are a helpful Filipino language coach for UPCAT prep.
-
-Facts you MUST use:
-- Correct word: {correct}
-- Official definition: {definition}
-- Example sentence: {example}
-- Student submitted: "{selected}"
-
-Task:
-The student filled in the blank incorrectly. Analyze their answer step-by-step.
-
-Output 4 bullets:
-1) Why "{correct}" is the correct answer.
-2) Is the submitted answer a valid word? If yes, what does it mean? If no, say it's invalid/gibberish.
-3) A quick vocabulary/grammar note.
-4) A time-pressure tip."""
-
-def tips_prompt(data: dict) -> str:
-    """Generate tips prompt"""
-    return f"""You are a coach for UPCAT Filipino.
-
-Student summary:
-- Score: {data["score"]}%
-- Missed low-frequency words: {data["missedLowFreq"]}
-- Similar-choice errors: {data["similarChoiceErrors"]}
-- Last difficulty: {data["lastDifficulty"]}
-
-Give:
-- 3 short, actionable tips (bullets)
-- A 15–20 minute plan with concrete steps (bullets)"""
-
-def redefine_prompt(data: dict) -> str:
-    """Generate redefine prompt"""
-    return f"""Rewrite the definition and examples for Filipino word "{data["word"]}".
-
-Base meaning: {data["baseMeaning"]}
-Base example: {data["example"]}
-
-Return:
-- Easy definition (casual, must be in English)
-- Brief formal definition (academic, must be in Filipino)
-- 2 new example sentences (Filipino)
-- 1 short bilingual gloss (Filipino)"""
+    entry = get_vocabulary_entry(request.word)
+    definition = entry.meaning if entry else request.correct
+    note = f'Example: "{entry.example}"' if entry and entry.example else (
+        f'Say "{request.correct}" syllable by syllable before writing it.'
+    )
+    return "\n".join([
+        f'1) "{request.correct}" is the correct answer: it means {definition}.',
+        f'2) "{request.selected}" is not a valid word; it is a misspelling of "{request.correct}", so your idea was right.',
+        f'3) Spelling note: {note}',
+        "4) Time-pressure tip: reread your answer once before submitting; small spelling slips still cost the point.",
+    ])
+
+# ============================================================
+# FALLBACKS (served when the upstream is unavailable)
+# ============================================================
+
+MODULE_TIPS = {
+    "vocabulary": "Review low-frequency words with their example sentences, not just the meaning.",
+    "grammar": "Name the rule behind each error (pang-angkop, panghalip, aspekto) before answering.",
+    "sentence-construction": "Find the verb and the subject first, then place the connectors.",
+    "reading-comprehension": "Read the question before the passage and underline the key clue words.",
+}
+
+def record_fallback(endpoint: str, error: UpstreamUnavailable):
+    print(f"⚠️  /{endpoint}: serving fallback ({error})")
+    UPSTREAM_FALLBACKS.inc(endpoint=endpoint, reason=error.reason)
+
+def fallback_explanation(request: ExplainRequest) -> str:
+    """Explanation built from the dataset meaning and example"""
+    entry = get_vocabulary_entry(request.word)
+    definition = entry.meaning if entry else request.correct
+    example = entry.example if entry and entry.example else ""
+    if request.mode == "fill-blanks":
+        first = f'1) The correct answer is "{request.correct}". Definition: {definition}.'
+    else:
+        first = f'1) "{request.word}" means {request.correct}. Definition: {definition}.'
+    # Clients read the bullets by position, so the second one stays without a selection
+    if request.selected:
+        second = f'2) "{request.selected}" does not match that meaning in this context.'
+    else:
+        second = "2) Check each choice against this meaning in the context of the sentence."
+    return "\n".join([
+        first,
+        second,
+        f'3) Example: "{example}"' if example else f'3) Note: learn "{request.word}" together with a sample sentence.',
+        "4) Time-pressure tip: eliminate choices that do not fit the sentence before picking one.",
+    ])
+
+def fallback_tips(profile: Dict[str, str]) -> str:
+    """Static tips for a profile"""
+    return "\n".join([
+        f"- {MODULE_TIPS.get(profile['module'], MODULE_TIPS['vocabulary'])}",
+        "- When two choices look alike, compare them word by word against the sentence.",
+        f"- Practice a few {profile['lastDifficulty']} items untimed, then retake them timed.",
+        "",
+        "15–20 minute plan:",
+        "- 5 min: review the items you missed and why.",
+        "- 10 min: drill a short set from this module.",
+        "- 5 min: retry the missed items without notes.",
+    ])
+
+def fallback_redefinition(request: RedefineRequest) -> str:
+    """Redefinition built from the base meaning and example"""
+    return "\n".join([
+        f"- Definition: {request.baseMeaning}",
+        f'- Example: "{request.example}"',
+    ])
+
+# ============================================================
+# RESPONSE CACHE
+# ============================================================
+
+explain_cache = ResponseCache(
+    "explain",
+    RESPONSE_CACHE_PATH,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    max_memory_items=RESPONSE_CACHE_MEMORY_ITEMS,
+    max_disk_items=RESPONSE_CACHE_DISK_ITEMS,
+)
+
+def explain_cache_key(request: ExplainRequest) -> str:
+    """Cache key for a normalized explain request"""
+    return make_key(
+        EXPLAIN_PROMPT_VERSION,
+        EXPLAIN_SYSTEM_PROMPT,
+        CHAT_MODEL,
+        EXPLAIN_TEMPERATURE,
+        request.mode,
+        normalize_text(request.word),
+        normalize_text(request.correct),
+        normalize_text(request.selected),
+        get_lexicon().version if request.mode == "fill-blanks" else "",
+    )
+
+# Tips are cached per bucketed profile, not per raw request
+tips_cache = ResponseCache(
+    "tips",
+    RESPONSE_CACHE_PATH,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    max_memory_items=RESPONSE_CACHE_MEMORY_ITEMS,
+    max_disk_items=RESPONSE_CACHE_DISK_ITEMS,
+)
+
+def tips_cache_key(profile: Dict[str, str]) -> str:
+    return make_key(*tips_version(), tips_key(profile))
+
+# Produced offline by `python pregenerate.py redefine` / `python pregenerate.py tips`
+redefine_artifact = Artifact(redefine_artifact_path())
+tips_artifact = Artifact(tips_artifact_path())
+
+def collect_cache_metrics():
+    """Mirror cache counters into /metrics at scrape time"""
+    for cache in (explain_cache, tips_cache):
+        stats = cache.counter_stats()
+        for result in ("memory_hits", "disk_hits", "misses"):
+            CACHE_LOOKUPS.set_total(stats[result], cache=cache.name, result=result)
+        CACHE_HIT_RATIO.set(stats["hit_ratio"], cache=cache.name)
+
+    # Coalesced upstream calls behave like hits on the in-flight "cache"
+    flights = openai_client.chat_flights.stats()
+    CACHE_LOOKUPS.set_total(flights["coalesced"], cache="upstream_coalescing", result="coalesced")
+    CACHE_LOOKUPS.set_total(flights["executed"], cache="upstream_coalescing", result="executed")
+    calls = flights["coalesced"] + flights["executed"]
+    CACHE_HIT_RATIO.set(flights["coalesced"] / calls if calls else 0.0, cache="upstream_coalescing")
+
+REGISTRY.add_collector(collect_cache_metrics)
+
+# ============================================================
+# STREAMING
+# ============================================================
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_completion(
+    endpoint: str,
+    field: str,
+    messages: List[dict],
+    temperature: float,
+    cached: Optional[str] = None,
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+    fallback: Optional[Callable[[], str]] = None,
+) -> StreamingResponse:
+    """Forward completion tokens as SSE "delta" events
+
+    The stream ends with a "done" event carrying the full text under
+    `field` (matching the non-streaming response), or an "error" event.
+    If the upstream is unavailable before any token arrives, the
+    fallback text is sent instead. The user's token budget is charged
+    up front so an exhausted budget is a 429, not an SSE error.
+    """
+    if cached is None:
+        limiter.charge_tokens(endpoint, estimate_tokens(messages))
+
+    async def events():
+        if cached is not None:
+            yield sse_event({"delta": cached})
+            yield sse_event({field: cached}, event="done")
+            return
+
+        parts = []
+        try:
+            async for delta in openai_client.stream_chat_completion(
+                endpoint,
+                model=CHAT_MODEL,
+                temperature=temperature,
+                messages=messages
+            ):
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except UpstreamUnavailable as e:
+            if parts or fallback is None:
+                yield sse_event({"detail": str(e)}, event="error")
+                return
+            record_fallback(endpoint, e)
+            text = fallback()
+            yield sse_event({"delta": text})
+            yield sse_event({field: text}, event="done")
+            return
+        except Exception as e:
+            print(f"Error in /{endpoint}/stream: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+            return
+
+        text = "".join(parts)
+        if text and on_complete:
+            await on_complete(text)
+        yield sse_event({field: text}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # ============================================================
 # ENDPOINTS
@@ -186,7 +441,7 @@ async def root():
     return HealthResponse(
         status="running",
         message="UPCAT Filipino AI Service",
-        openai_configured=bool(api_key)
+        openai_configured=openai_client.api_key_configured()
     )
 
 @app.get("/health")
@@ -194,148 +449,288 @@ async def health_check():
     """Detailed health check"""
     checks = {
         "service": "online",
-        "openai_key_configured": bool(api_key),
-        "vocabulary_data_loaded": False,
+        "openai_key_configured": openai_client.api_key_configured(),
+        "vocabulary_data_loaded": readiness["vocabulary"]["ready"],
+        "components": readiness,
     }
-    
-    try:
-        from data.vocabulary_core import vocabulary_data
-        checks["vocabulary_data_loaded"] = len(vocabulary_data) > 0
-        checks["vocabulary_count"] = len(vocabulary_data)
-    except ImportError:
-        pass
+
+    checks["explain_cache"] = await explain_cache.stats()
+    checks["upstream_coalescing"] = openai_client.chat_flights.stats()
+    checks["rate_limiter"] = limiter.stats()
+    checks["tips_cache"] = await tips_cache.stats()
+    checks["redefine_artifact"] = len(redefine_artifact)
+    checks["tips_artifact"] = len(tips_artifact)
+    checks["circuit_breakers"] = resilience.stats()
+    checks["prompt_variant"] = PROMPT_VARIANT
+    checks["token_usage"] = openai_client.usage_stats()
     
     return checks
 
-@app.post("/explain", response_model=ExplainResponse)
-async def explain(request: ExplainRequest):
-    """Generate AI explanation for incorrect answers"""
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up and serving"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 503 until every required component is warm"""
+    ready = all(state["ready"] for name, state in readiness.items() if name in REQUIRED_COMPONENTS)
+    return JSONResponse(
+        {"ready": ready, "components": readiness},
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+async def generate_explanation(request: ExplainRequest) -> str:
+    """Explanation for one request, served from the cache when possible"""
+    verdict = await lexicon_verdict(request)
+    typo = typo_explanation(request, verdict)
+    if typo is not None:
+        return typo
+
+    cache_key = explain_cache_key(request)
+    cached = await explain_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        # Get vocabulary entry
-        entry = get_vocabulary_entry(request.word)
-        definition = entry["meaning"] if entry else request.correct
-        example = entry["example"] if entry else ""
-
-        # Generate prompt
-        prompt = explanation_prompt({
-            "mode": request.mode,
-            "word": request.word,
-            "correct": request.correct,
-            "selected": request.selected,
-            "definition": definition,
-            "example": example
-        })
-
-        # Call OpenAI
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.2,
-            messages=[
-                {"role": "system", "content": "Be concise, accurate, and friendly."},
-                {"role": "user", "content": prompt}
-            ]
+        completion = await openai_client.chat_completion(
+            "explain",
+            model=CHAT_MODEL,
+            temperature=EXPLAIN_TEMPERATURE,
+            messages=explain_messages(request, verdict)
         )
+    except UpstreamUnavailable as e:
+        record_fallback("explain", e)
+        return fallback_explanation(request)
 
-        explanation = completion.choices[0].message.content or ""
+    explanation = completion.choices[0].message.content or ""
+    if explanation:
+        await explain_cache.set(cache_key, explanation)
+    return explanation
+
+@app.post("/explain", response_model=ExplainResponse, dependencies=[Depends(rate_limit("explain"))])
+async def explain(request: ExplainRequest):
+    """Generate AI explanation for incorrect answers"""
+    try:
+        explanation = await generate_explanation(request)
         return ExplainResponse(explanation=explanation)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /explain: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tips", response_model=TipsResponse)
+@app.post("/explain/batch", response_model=ExplainBatchResponse, dependencies=[Depends(rate_limit("explain_batch"))])
+async def explain_batch(request: ExplainBatchRequest):
+    """Generate explanations for several wrong answers in one round trip
+
+    Duplicate items share one generation; results keep the input order and
+    each item reports its own success or failure.
+    """
+    unique = {}
+    for item in request.items:
+        unique.setdefault(explain_cache_key(item), item)
+
+    limit = asyncio.Semaphore(EXPLAIN_BATCH_CONCURRENCY)
+
+    async def run(item: ExplainRequest) -> ExplainBatchItem:
+        async with limit:
+            try:
+                return ExplainBatchItem(ok=True, explanation=await generate_explanation(item))
+            except Exception as e:
+                print(f"Error in /explain/batch: {e}")
+                return ExplainBatchItem(ok=False, error=str(e))
+
+    keys = list(unique)
+    outcomes = await asyncio.gather(*(run(unique[key]) for key in keys))
+    by_key = dict(zip(keys, outcomes))
+
+    return ExplainBatchResponse(
+        results=[by_key[explain_cache_key(item)] for item in request.items]
+    )
+
+@app.post("/explain/stream", dependencies=[Depends(rate_limit("explain"))])
+async def explain_stream(request: ExplainRequest):
+    """Stream an AI explanation as server-sent events"""
+    cache_key = explain_cache_key(request)
+    verdict = await lexicon_verdict(request)
+    typo = typo_explanation(request, verdict)
+    return stream_completion(
+        "explain",
+        "explanation",
+        explain_messages(request, verdict),
+        EXPLAIN_TEMPERATURE,
+        cached=typo if typo is not None else await explain_cache.get(cache_key),
+        on_complete=lambda text: explain_cache.set(cache_key, text),
+        fallback=lambda: fallback_explanation(request),
+    )
+
+async def cached_tips(profile: Dict[str, str]) -> Optional[str]:
+    """Tips for a profile from the offline artifact or the response cache"""
+    tips = tips_artifact.get(tips_key(profile))
+    CACHE_LOOKUPS.inc(cache="tips_artifact", result="miss" if tips is None else "hit")
+    if tips is None:
+        tips = await tips_cache.get(tips_cache_key(profile))
+    return tips
+
+@app.post("/tips", response_model=TipsResponse, dependencies=[Depends(rate_limit("tips"))])
 async def generate_tips(request: TipsRequest):
     """Generate personalized study tips"""
     try:
-        prompt = tips_prompt(request.dict())
-
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            messages=[
-                {"role": "system", "content": "Be practical and concise."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        profile = tips_profile(request.dict())
+        tips = await cached_tips(profile)
+        if tips is not None:
+            return TipsResponse(tips=tips)
+
+        try:
+            completion = await openai_client.chat_completion(
+                "tips",
+                model=CHAT_MODEL,
+                temperature=TIPS_TEMPERATURE,
+                messages=tips_messages(profile)
+            )
+        except UpstreamUnavailable as e:
+            record_fallback("tips", e)
+            return TipsResponse(tips=fallback_tips(profile))
 
         tips = completion.choices[0].message.content or ""
+        if tips:
+            await tips_cache.set(tips_cache_key(profile), tips)
         return TipsResponse(tips=tips)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /tips: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/redefine", response_model=RedefineResponse)
+@app.post("/tips/stream", dependencies=[Depends(rate_limit("tips"))])
+async def generate_tips_stream(request: TipsRequest):
+    """Stream personalized study tips as server-sent events"""
+    profile = tips_profile(request.dict())
+    return stream_completion(
+        "tips",
+        "tips",
+        tips_messages(profile),
+        TIPS_TEMPERATURE,
+        cached=await cached_tips(profile),
+        on_complete=lambda text: tips_cache.set(tips_cache_key(profile), text),
+        fallback=lambda: fallback_tips(profile),
+    )
+
+def pregenerated_redefinition(request: RedefineRequest) -> Optional[str]:
+    """Redefinition from the offline artifact, if present"""
+    content = redefine_artifact.get(redefine_key(request.word, request.baseMeaning, request.example))
+    CACHE_LOOKUPS.inc(cache="redefine_artifact", result="miss" if content is None else "hit")
+    return content
+
+@app.post("/redefine", response_model=RedefineResponse, dependencies=[Depends(rate_limit("redefine"))])
 async def redefine_word(request: RedefineRequest):
     """Redefine word with multiple perspectives"""
     try:
-        prompt = redefine_prompt(request.dict())
-
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.2,
-            messages=[
-                {"role": "system", "content": "Return concise teaching content."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        content = pregenerated_redefinition(request)
+        if content is not None:
+            return RedefineResponse(content=content)
+
+        try:
+            completion = await openai_client.chat_completion(
+                "redefine",
+                model=CHAT_MODEL,
+                temperature=REDEFINE_TEMPERATURE,
+                messages=redefine_messages(request.dict())
+            )
+        except UpstreamUnavailable as e:
+            record_fallback("redefine", e)
+            return RedefineResponse(content=fallback_redefinition(request))
 
         content = completion.choices[0].message.content or ""
         return RedefineResponse(content=content)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /redefine: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/confusables", response_model=ConfusablesResponse)
+@app.post("/redefine/stream", dependencies=[Depends(rate_limit("redefine"))])
+async def redefine_word_stream(request: RedefineRequest):
+    """Stream a word redefinition as server-sent events"""
+    return stream_completion(
+        "redefine",
+        "content",
+        redefine_messages(request.dict()),
+        REDEFINE_TEMPERATURE,
+        cached=pregenerated_redefinition(request),
+        fallback=lambda: fallback_redefinition(request),
+    )
+
+async def embedding_confusables(word: str, top_k: int) -> List[str]:
+    """Nearest vocabulary words by embedding"""
+    index = await get_vocabulary_index()
+
+    # Reuse the stored vector for vocabulary words; embed anything else
+    target_emb = index.vector(word)
+    if target_emb is None:
+        target_emb = (await openai_client.embed_texts("confusables", [word]))[0]
+
+    return [w for w, _ in index.top_k(target_emb, top_k, exclude=[word])]
+
+def orthographic_confusables(word: str, top_k: int) -> List[str]:
+    """Closest words by spelling and affixes"""
+    return [w for w, _ in get_orthographic_engine().similar(word, top_k)]
+
+def blended_confusables(word: str, top_k: int) -> List[str]:
+    """Spelling/affix matches, re-ranked with embedding scores when the vector is local"""
+    scores: Dict[str, float] = get_orthographic_engine().scored(word)
+    target_emb = vocabulary_index.vector(word) if vocabulary_index is not None else None
+    if target_emb is not None:
+        weight = CONFUSABLES_EMBEDDING_WEIGHT
+        similarity = vocabulary_index.scores(target_emb)
+        nearest = [w for w, _ in vocabulary_index.top_k(target_emb, top_k * 4, exclude=[word])]
+        for candidate in set(scores).union(nearest):
+            position = vocabulary_index.position(candidate)
+            embedding_score = float(similarity[position]) if position is not None else 0.0
+            scores[candidate] = (1 - weight) * scores.get(candidate, 0.0) + weight * embedding_score
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [w for w, _ in ranked[:top_k]]
+
+@app.post("/confusables", response_model=ConfusablesResponse, dependencies=[Depends(rate_limit("confusables"))])
 async def find_confusables(request: ConfusablesRequest):
-    """Find similar/confusing words using embeddings"""
+    """Find similar/confusing words by spelling and affixes, optionally blended with embeddings"""
     try:
-        from data.vocabulary_core import vocabulary_data
-        import math
-
-        def cosine_similarity(a, b):
-            dot = sum(x * y for x, y in zip(a, b))
-            na = math.sqrt(sum(x * x for x in a))
-            nb = math.sqrt(sum(x * x for x in b))
-            return dot / (na * nb + 1e-9)
-
-        # Get all candidate words
-        candidates = [v["word"] for v in vocabulary_data]
-
-        # Get embeddings
-        target_emb = openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=request.word
-        ).data[0].embedding
-
-        cand_embs = openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=candidates
-        ).data
-
-        # Calculate similarities
-        scored = []
-        for i, emb_data in enumerate(cand_embs):
-            if candidates[i] != request.word:
-                score = cosine_similarity(target_emb, emb_data.embedding)
-                scored.append({"word": candidates[i], "score": score})
-
-        # Get top K
-        ranked = sorted(scored, key=lambda x: x["score"], reverse=True)[:request.topK]
+        store = get_vocabulary_store()
+        # Edit-distance scoring is CPU-bound, so it runs off the event loop
+        if request.method == "embedding":
+            try:
+                ranked = await embedding_confusables(request.word, request.topK)
+            except UpstreamUnavailable as e:
+                record_fallback("confusables", e)
+                ranked = await asyncio.to_thread(orthographic_confusables, request.word, request.topK)
+        elif request.method == "orthographic":
+            ranked = await asyncio.to_thread(orthographic_confusables, request.word, request.topK)
+        else:
+            ranked = await asyncio.to_thread(blended_confusables, request.word, request.topK)
 
         # Build results
         results = []
-        for r in ranked:
-            entry = next(v for v in vocabulary_data if v["word"] == r["word"])
+        for word in ranked:
+            entry = store.get(word)
             results.append(ConfusableWord(
-                word=r["word"],
-                meaning=entry["meaning"],
-                example=entry["example"]
+                word=entry.word,
+                meaning=entry.meaning,
+                example=entry.example
             ))
 
         return ConfusablesResponse(results=results)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /confusables: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -344,38 +739,105 @@ async def find_confusables(request: ConfusablesRequest):
 # STARTUP
 # ============================================================
 
+# Components reported by /readyz; all but the embedding index gate readiness
+# (confusables fall back to spelling-only matches while it is cold)
+readiness: Dict[str, dict] = {
+    name: {"ready": False, "detail": "pending"}
+    for name in ("vocabulary", "orthography", "lexicon", "artifacts", "openai", "embeddings")
+}
+REQUIRED_COMPONENTS = ("vocabulary", "orthography", "lexicon", "artifacts", "openai")
+
+warmup_task: Optional[asyncio.Task] = None
+
+def mark_component(name: str, ready: bool, detail: str):
+    readiness[name] = {"ready": ready, "detail": detail}
+    print(f"{'✅' if ready else '⚠️ '} {name}: {detail}")
+
+async def warm_up():
+    """Build heavy components in the background while the port is already open"""
+    steps = [
+        ("vocabulary", lambda: f"{len(get_vocabulary_store())} words"),
+        ("orthography", lambda: f"{len(get_orthographic_engine().words)} words indexed"),
+        ("lexicon", lambda: f"{len(get_lexicon())} words"),
+        ("artifacts", lambda: f"{len(redefine_artifact)} redefinitions, {len(tips_artifact)} tip profiles"),
+    ]
+    for name, load in steps:
+        try:
+            mark_component(name, True, await asyncio.to_thread(load))
+        except Exception as e:
+            mark_component(name, False, f"failed: {e}")
+
+    try:
+        openai_client.get_client()
+        mark_component("openai", True, "client ready")
+    except Exception as e:
+        mark_component("openai", False, getattr(e, "detail", str(e)))
+
+    # Loads the matrix from disk when present; only a cold cache needs the API
+    try:
+        await get_vocabulary_index()
+    except Exception as e:
+        mark_component("embeddings", False, f"will retry on first request ({e})")
+
 @app.on_event("startup")
 async def startup_event():
-    """Run on startup"""
+    """Start serving immediately; warm up in the background"""
+    global warmup_task
     print("\n" + "="*60)
     print("🚀 UPCAT Filipino AI Service Starting...")
     print("="*60)
-    print(f"✅ OpenAI API Key: {'Configured' if api_key else 'Missing'}")
-    
-    try:
-        from data.vocabulary_core import vocabulary_data
-        print(f"✅ Vocabulary Data: {len(vocabulary_data)} words loaded")
-    except ImportError:
-        print("⚠️  Vocabulary Data: Not found (vocabulary_core.py missing)")
-    
-    print("="*60)
+    print(f"{'✅' if openai_client.api_key_configured() else '❌'} OpenAI API Key: "
+          f"{'Configured' if openai_client.api_key_configured() else 'Missing (set it in ai-service/.env)'}")
     print(f"🌐 Server running on http://localhost:8001")
     print(f"📚 API Docs: http://localhost:8001/docs")
+    print(f"🩺 Readiness: http://localhost:8001/readyz")
     print("="*60 + "\n")
+    warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Run on shutdown"""
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await openai_client.close()
+    explain_cache.close()
+    tips_cache.close()
 
 # ============================================================
 # RUN SERVER
 # ============================================================
 
+async def prebuild_shared_artifacts():
+    """Build the on-disk indexes once so every worker only attaches to them"""
+    print(f"✅ Lexicon: {len(get_lexicon())} words")
+    try:
+        print(f"✅ Vocabulary Embeddings: {len((await get_vocabulary_index()))} vectors")
+    except Exception as e:
+        print(f"⚠️  Vocabulary Embeddings: workers will build them on demand ({e})")
+    finally:
+        await openai_client.close()
+
 if __name__ == "__main__":
     import uvicorn
     
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8001))
+    workers = int(os.getenv("WORKERS", "1"))
     
-    uvicorn.run(
-        app,
-        host=host,
-        port=port,
-        log_level="info"
-    )
\ No newline at end of file
+    if workers > 1:
+        # Workers memory-map the lexicon and embedding matrices built here
+        asyncio.run(prebuild_shared_artifacts())
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            app,
+            host=host,
+            port=port,
+            log_level="info"
+        )
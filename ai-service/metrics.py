@@ -0,0 +1,253 @@
+"""
+Prometheus-style metrics
+Small in-process counters, gauges and histograms rendered in the
+Prometheus text exposition format by the /metrics endpoint
+(values are per worker process)
+"""
+
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Request and upstream latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, values, value in self.samples():
+            names = self.labelnames + (("le",) if suffix == "_bucket" else ())
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Mirror a total kept elsewhere (e.g. cache counters) at scrape time"""
+        self._values[self._key(labels)] = value
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield "_total", key, value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield "", key, value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self):
+        for key, counts in sorted(self._counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield "_bucket", key + (_format_value(bound),), count
+            yield "_sum", key, self._sums[key]
+            yield "_count", key, counts[-1]
+
+
+class Registry:
+    """Holds metrics and callbacks that refresh gauges at scrape time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]):
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+
+# ============================================================
+# SERVICE METRICS
+# ============================================================
+
+REQUEST_LATENCY = histogram(
+    "aiservice_request_duration_seconds",
+    "Time to produce a response (first byte for streams), by endpoint",
+    ["endpoint", "method"],
+)
+REQUESTS_IN_FLIGHT = gauge(
+    "aiservice_requests_in_flight",
+    "Requests currently being handled, by endpoint",
+    ["endpoint"],
+)
+REQUEST_ERRORS = counter(
+    "aiservice_request_errors",
+    "Responses with an error status, by endpoint and status code",
+    ["endpoint", "status"],
+)
+UPSTREAM_LATENCY = histogram(
+    "aiservice_upstream_duration_seconds",
+    "OpenAI call latency, by endpoint, operation and prompt variant",
+    ["endpoint", "operation", "variant"],
+)
+UPSTREAM_ERRORS = counter(
+    "aiservice_upstream_errors",
+    "Failed OpenAI calls, by endpoint, operation and error type",
+    ["endpoint", "operation", "type"],
+)
+UPSTREAM_TOKENS = counter(
+    "aiservice_upstream_tokens",
+    "Tokens reported in completion.usage, by endpoint, kind (prompt, cached, completion) and prompt variant",
+    ["endpoint", "kind", "variant"],
+)
+CACHE_LOOKUPS = counter(
+    "aiservice_cache_lookups",
+    "Cache lookups, by cache and result",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = gauge(
+    "aiservice_cache_hit_ratio",
+    "Fraction of cache lookups that were hits, by cache",
+    ["cache"],
+)
+RATE_LIMITED = counter(
+    "aiservice_rate_limited",
+    "Requests rejected with 429, by endpoint and limit",
+    ["endpoint", "limit"],
+)
+UPSTREAM_QUEUE_WAIT = histogram(
+    "aiservice_upstream_queue_wait_seconds",
+    "Time spent waiting for the global upstream budget, by endpoint",
+    ["endpoint"],
+)
+UPSTREAM_BUDGET = gauge(
+    "aiservice_upstream_budget_available",
+    "Remaining global upstream budget, by kind (requests or tokens)",
+    ["kind"],
+)
+RATE_LIMIT_KEYS = gauge(
+    "aiservice_rate_limit_tracked_keys",
+    "Per-user buckets currently tracked",
+)
+UPSTREAM_RETRIES = counter(
+    "aiservice_upstream_retries",
+    "Upstream calls retried after a transient failure, by endpoint and operation",
+    ["endpoint", "operation"],
+)
+UPSTREAM_HEDGES = counter(
+    "aiservice_upstream_hedges",
+    "Second (hedged) requests sent for slow upstream calls, by endpoint",
+    ["endpoint"],
+)
+BREAKER_STATE = gauge(
+    "aiservice_circuit_breaker_state",
+    "Circuit breaker state by endpoint (0 closed, 1 half-open, 2 open)",
+    ["endpoint"],
+)
+UPSTREAM_FALLBACKS = counter(
+    "aiservice_upstream_fallbacks",
+    "Responses served from fallback content, by endpoint and reason",
+    ["endpoint", "reason"],
+)
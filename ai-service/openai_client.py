@@ -1,4 +1,225 @@
-from openai import OpenAI
+"""
+Shared async OpenAI client
+All upstream calls go through one pooled HTTP connection set and are
+bounded by a global and a per-endpoint concurrency limit. The client is
+created on first use, so the service starts without a key.
+"""
+
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException
+from openai import AsyncOpenAI
+
+from cache import make_key
+from config import (
+    EMBEDDING_MODEL,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_TIMEOUT,
+    endpoint_setting,
+)
+from metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, UPSTREAM_TOKENS
+from prompts import PROMPT_VARIANT
+from ratelimit import estimate_tokens, limiter
+from resilience import call_upstream
+from singleflight import SingleFlight
+
+client: Optional[AsyncOpenAI] = None
+
+
+class UpstreamNotConfigured(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="OPENAI_API_KEY is not configured")
+
+
+def api_key_configured() -> bool:
+    api_key = os.getenv("OPENAI_API_KEY")
+    return bool(api_key) and api_key != "your_openai_api_key_here"
+
+
+def get_client() -> AsyncOpenAI:
+    """The shared client, created on first use"""
+    global client
+    if client is None:
+        if not api_key_configured():
+            raise UpstreamNotConfigured()
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=OPENAI_TIMEOUT,
+            # Retries are handled by resilience.call_upstream
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                ),
+                timeout=OPENAI_TIMEOUT,
+            ),
+        )
+    return client
+
+# Identical chat requests in flight at the same time share one upstream call
+chat_flights = SingleFlight()
+
+_global_limit = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+_endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def endpoint_timeout(endpoint: str) -> float:
+    """Per-call timeout for an endpoint (OPENAI_TIMEOUT_<ENDPOINT>)"""
+    return float(endpoint_setting("OPENAI_TIMEOUT", endpoint, str(OPENAI_TIMEOUT)))
+
+
+@asynccontextmanager
+async def concurrency_limit(endpoint: str):
+    """Hold a slot in the endpoint limit and the global limit"""
+    limit = _endpoint_limits.get(endpoint)
+    if limit is None:
+        size = int(endpoint_setting("OPENAI_MAX_CONCURRENCY", endpoint, str(OPENAI_MAX_CONCURRENCY)))
+        limit = _endpoint_limits.setdefault(endpoint, asyncio.Semaphore(size))
+
+    async with limit:
+        async with _global_limit:
+            yield
+
+
+@asynccontextmanager
+async def observe_upstream(endpoint: str, operation: str, variant: str = PROMPT_VARIANT):
+    """Record latency and failures of one upstream call"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(endpoint=endpoint, operation=operation, type=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(
+            time.perf_counter() - started, endpoint=endpoint, operation=operation, variant=variant
+        )
+
+
+# Token totals per endpoint since start: prompt, cached (prompt tokens
+# served from the provider's prefix cache), completion and calls
+token_usage: Dict[str, Dict[str, int]] = {}
+
+
+def _field(value, name: str):
+    # Fields newer than the installed SDK arrive as plain dicts
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def record_usage(endpoint: str, usage):
+    """Count prompt, cached and completion tokens from completion.usage"""
+    if usage is None:
+        return
+    counts = {
+        "prompt": _field(usage, "prompt_tokens") or 0,
+        "cached": _field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0,
+        "completion": _field(usage, "completion_tokens") or 0,
+    }
+    totals = token_usage.setdefault(endpoint, {"calls": 0, "prompt": 0, "cached": 0, "completion": 0})
+    totals["calls"] += 1
+    for kind, count in counts.items():
+        totals[kind] += count
+        UPSTREAM_TOKENS.inc(count, endpoint=endpoint, kind=kind, variant=PROMPT_VARIANT)
+
+
+def usage_stats() -> Dict[str, Dict[str, float]]:
+    """Token totals per endpoint, with the cached share of prompt tokens"""
+    return {
+        endpoint: {**totals, "cached_ratio": totals["cached"] / totals["prompt"] if totals["prompt"] else 0.0}
+        for endpoint, totals in token_usage.items()
+    }
+
+
+async def chat_completion(endpoint: str, **kwargs):
+    """Create a chat completion on behalf of an endpoint
+
+    Concurrent calls with the same model parameters and messages are
+    coalesced into one upstream request, which is retried and hedged
+    under the endpoint's deadline.
+    """
+    timeout = kwargs.pop("timeout", None) or endpoint_timeout(endpoint)
+    tokens = estimate_tokens(kwargs.get("messages", []))
+    limiter.charge_tokens(endpoint, tokens)
+
+    async def attempt(remaining: float):
+        await limiter.acquire_upstream(endpoint, tokens)
+        async with concurrency_limit(endpoint):
+            async with observe_upstream(endpoint, "chat"):
+                completion = await get_client().chat.completions.create(
+                    timeout=min(timeout, remaining), **kwargs
+                )
+        record_usage(endpoint, getattr(completion, "usage", None))
+        return completion
+
+    async def call():
+        return await call_upstream(endpoint, "chat", attempt, hedge=True)
+
+    return await chat_flights.do(make_key(kwargs), call)
+
+
+async def stream_chat_completion(endpoint: str, **kwargs) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding content deltas as they arrive
+
+    The concurrency slot is held until the stream is exhausted or closed.
+    Opening the stream is retried; a failure mid-stream is not. The
+    caller charges the user's token budget before the response starts.
+    """
+    timeout = kwargs.pop("timeout", None) or endpoint_timeout(endpoint)
+    tokens = estimate_tokens(kwargs.get("messages", []))
+
+    async def attempt(remaining: float):
+        await limiter.acquire_upstream(endpoint, tokens)
+        return await get_client().chat.completions.create(
+            stream=True,
+            # The final chunk then carries usage (and no choices)
+            extra_body={"stream_options": {"include_usage": True}},
+            timeout=min(timeout, remaining),
+            **kwargs
+        )
+
+    async with concurrency_limit(endpoint):
+        async with observe_upstream(endpoint, "chat_stream"):
+            stream = await call_upstream(endpoint, "chat_stream", attempt)
+            try:
+                async for chunk in stream:
+                    record_usage(endpoint, getattr(chunk, "usage", None))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.response.aclose()
+
+
+async def embed_texts(endpoint: str, texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts with the shared embedding model"""
+    tokens = sum(len(text) for text in texts) // 4
+    limiter.charge_tokens(endpoint, tokens)
+
+    async def attempt(remaining: float):
+        await limiter.acquire_upstream(endpoint, tokens)
+        async with concurrency_limit(endpoint):
+            async with observe_upstream(endpoint, "embeddings", variant="none"):
+                return await get_client().embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=texts,
+                    timeout=min(endpoint_timeout(endpoint), remaining),
+                )
+
+    response = await call_upstream(endpoint, "embeddings", attempt)
+    return [item.embedding for item in response.data]
+
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async def close():
+    """Release pooled connections"""
+    global client
+    if client is not None:
+        await client.close()
+        client = None
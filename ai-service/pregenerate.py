@@ -0,0 +1,130 @@
+"""
+Offline pre-generation of completions
+Walks a fixed input space, generates each completion with bounded
+concurrency and appends it to a versioned artifact as soon as it
+finishes. Re-running skips everything already in the artifact, so an
+interrupted run resumes where it stopped.
+
+    python pregenerate.py redefine --concurrency 4
+    python pregenerate.py tips
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import openai_client
+from artifacts import (
+    Artifact,
+    redefine_artifact_path,
+    redefine_key,
+    tips_artifact_path,
+    tips_key,
+)
+from config import CHAT_MODEL
+from data.vocabulary_store import get_vocabulary_store
+from prompts import (
+    REDEFINE_TEMPERATURE,
+    TIPS_TEMPERATURE,
+    all_tips_profiles,
+    redefine_messages,
+    tips_messages,
+)
+
+# (artifact key, chat messages, temperature, extra fields kept in the record)
+Job = Tuple[str, List[dict], float, Dict[str, str]]
+
+
+def redefine_jobs() -> List[Job]:
+    """One job per distinct (word, meaning, example) in the vocabulary"""
+    jobs = {}
+    for entry in get_vocabulary_store().entries:
+        key = redefine_key(entry.word, entry.meaning, entry.example)
+        data = {"word": entry.word, "baseMeaning": entry.meaning, "example": entry.example}
+        jobs.setdefault(key, (key, redefine_messages(data), REDEFINE_TEMPERATURE, {"word": entry.word}))
+    return list(jobs.values())
+
+
+def tips_jobs() -> List[Job]:
+    """One job per tips profile bucket"""
+    return [
+        (tips_key(profile), tips_messages(profile), TIPS_TEMPERATURE, profile)
+        for profile in all_tips_profiles()
+    ]
+
+
+TASKS: Dict[str, Tuple[Callable[[], List[Job]], Callable[[], str]]] = {
+    "redefine": (redefine_jobs, redefine_artifact_path),
+    "tips": (tips_jobs, tips_artifact_path),
+}
+
+
+async def run(endpoint: str, jobs: List[Job], artifact: Artifact, concurrency: int) -> int:
+    """Generate every job missing from the artifact; return the number of failures"""
+    pending = [job for job in jobs if job[0] not in artifact]
+    print(f"{endpoint}: {len(jobs)} items, {len(jobs) - len(pending)} done, {len(pending)} to generate")
+    print(f"artifact: {artifact.path}")
+
+    limit = asyncio.Semaphore(concurrency)
+    failures = 0
+    done = 0
+    started = time.perf_counter()
+
+    async def generate(job: Job):
+        nonlocal failures, done
+        key, messages, temperature, extra = job
+        async with limit:
+            try:
+                completion = await openai_client.chat_completion(
+                    endpoint,
+                    model=CHAT_MODEL,
+                    temperature=temperature,
+                    messages=messages,
+                )
+                content = completion.choices[0].message.content or ""
+                if not content:
+                    raise ValueError("empty completion")
+            except Exception as e:
+                failures += 1
+                print(f"  ✗ {extra}: {e}")
+                return
+        artifact.append(key, content, **extra)
+        done += 1
+        if done % 10 == 0 or done == len(pending):
+            print(f"  {done}/{len(pending)} ({time.perf_counter() - started:.1f}s)")
+
+    await asyncio.gather(*(generate(job) for job in pending))
+    return failures
+
+
+async def main_async(args) -> int:
+    build_jobs, path = TASKS[args.task]
+    jobs = build_jobs()
+    if args.limit:
+        jobs = jobs[:args.limit]
+    artifact = Artifact(path())
+    try:
+        failures = await run(args.task, jobs, artifact, args.concurrency)
+    finally:
+        await openai_client.close()
+    if failures:
+        print(f"{failures} item(s) failed; re-run to retry them")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate completions into versioned artifacts")
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N items (for trial runs)")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
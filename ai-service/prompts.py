@@ -1,88 +1,220 @@
-def explanation_prompt(input: dict) -> str:
-    mode = input["mode"]
-    word = input["word"]
-    correct = input["correct"]
-    selected = input.get("selected")
-    definition = input["definition"]
-    example = input["example"]
-
-    if mode == "quiz":
-        return f"""
-You are a helpful Filipino language coach for UPCAT prep.
-
-Facts you MUST use:
-- Word: {word}
-- Correct meaning: {correct}
-- Official definition: {definition}
-- Example sentence: {example}
-- Student selected: {selected}
+"""
+Prompt templates and completion settings
+Shared by the service and the offline pre-generation CLI. Each template
+is split into static instructions and per-request facts; PROMPT_VARIANT
+decides how they are laid out in the chat messages (see chat_messages).
+"""
+
+from itertools import product
+from typing import Dict, List
+
+from cache import template_version
+from config import PROMPT_VARIANT
+
+EXPLAIN_SYSTEM_PROMPT = "Be concise, accurate, and friendly."
+EXPLAIN_TEMPERATURE = 0.2
+TIPS_SYSTEM_PROMPT = "Be practical and concise."
+TIPS_TEMPERATURE = 0.3
+REDEFINE_SYSTEM_PROMPT = "Return concise teaching content."
+REDEFINE_TEMPERATURE = 0.2
+
+PROMPT_VARIANTS = ("prefix", "legacy")
+if PROMPT_VARIANT not in PROMPT_VARIANTS:
+    print(f"⚠️  Unknown PROMPT_VARIANT {PROMPT_VARIANT!r}; using \"prefix\"")
+    PROMPT_VARIANT = "prefix"
+
+
+def chat_messages(system: str, instructions: str, facts: str) -> List[dict]:
+    """Lay out a prompt according to PROMPT_VARIANT
+
+    "prefix": the system message carries every static instruction and the
+    user message only the request facts, so all requests to an endpoint
+    share one leading block that providers can serve from their prompt
+    cache. "legacy": facts first, then the task, in a single user message.
+    """
+    if PROMPT_VARIANT == "legacy":
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": f"{facts}\n\n{instructions}"}
+        ]
+    return [
+        {"role": "system", "content": f"{system}\n\n{instructions}"},
+        {"role": "user", "content": facts}
+    ]
+
+
+# ============================================================
+# EXPLAIN
+# ============================================================
+
+EXPLAIN_QUIZ_INSTRUCTIONS = """You are a helpful Filipino language coach for UPCAT prep.
 
 Task:
-Explain why the correct meaning is correct and why the selected choice is wrong.
+Explain why the correct meaning is correct and why the selected choice is wrong, using the facts you are given.
 
 Output 4 bullets:
 1) Why the correct answer is correct (use the definition).
 2) Why the selected choice is wrong (explain the difference or trap).
 3) A quick vocabulary/grammar note (one sentence).
-4) A time-pressure tip (one sentence).
-""".strip()
+4) A time-pressure tip (one sentence)."""
 
-    return f"""
-You are a helpful Filipino language coach for UPCAT prep.
-
-Facts you MUST use:
-- Correct word: {correct}
-- Official definition: {definition}
-- Example sentence: {example}
-- Student submitted: "{selected}"
+EXPLAIN_FILL_BLANKS_INSTRUCTIONS = """You are a helpful Filipino language coach for UPCAT prep.
 
 Task:
-The student filled in the blank incorrectly. Analyze their answer step-by-step:
-
-1) First, determine if "{selected}" is a valid Filipino word or gibberish/typo.
-2) If it's gibberish or a typo:
-   - Say it's not a valid Filipino word.
-   - Point out the correct word is "{correct}" which means "{definition}".
-   - If it's a near-miss spelling, mention the spelling error.
-3) If it's a real Filipino word but wrong:
-   - Briefly state what "{selected}" means.
-   - Explain why it doesn't fit the sentence context.
-   - Clarify why "{correct}" is the right fit.
+The student filled in the blank incorrectly. Analyze their answer step-by-step, using the facts you are given.
 
 Output 4 bullets:
-1) Why "{correct}" is the correct answer.
-2) Is the submitted answer valid?
+1) Why the correct word is the correct answer.
+2) Is the submitted answer a valid word? Use the lexicon check as a hint, not a verdict: a word missing from the lexicon may still be valid, so judge it yourself. If valid, what does it mean? If it is a near-miss spelling of the intended word, name it. Only call it invalid if it is not a Filipino word at all.
 3) A quick vocabulary/grammar note.
-4) A time-pressure tip.
-""".strip()
+4) A time-pressure tip."""
+
+
+def explanation_facts(data: dict) -> str:
+    """Per-request facts for an explanation"""
+    if data["mode"] == "quiz":
+        return f"""Facts you MUST use:
+- Word: {data["word"]}
+- Correct meaning: {data["correct"]}
+- Official definition: {data["definition"]}
+- Example sentence: {data["example"]}
+- Student selected: {data.get("selected")}"""
+
+    return f"""Facts you MUST use:
+- Correct word: {data["correct"]}
+- Official definition: {data["definition"]}
+- Example sentence: {data["example"]}
+- Student submitted: "{data.get("selected")}"
+- Lexicon check: {data["lexicon"]}"""
+
+
+def explanation_messages(data: dict) -> List[dict]:
+    """Chat messages for an explain request"""
+    instructions = EXPLAIN_QUIZ_INSTRUCTIONS if data["mode"] == "quiz" else EXPLAIN_FILL_BLANKS_INSTRUCTIONS
+    return chat_messages(EXPLAIN_SYSTEM_PROMPT, instructions, explanation_facts(data))
+
+
+# ============================================================
+# TIPS
+# ============================================================
 
+TIPS_INSTRUCTIONS = """You are a coach for UPCAT Filipino.
 
-def tips_prompt(input: dict) -> str:
-    return f"""
-You are a coach for UPCAT Filipino.
+Give, for the student summary provided:
+- 3 short, actionable tips for this module (bullets)
+- A 15–20 minute plan with concrete steps (bullets)"""
 
-Student summary:
-- Score: {input["score"]}%
-- Missed low-frequency words: {input["missedLowFreq"]}
-- Similar-choice errors: {input["similarChoiceErrors"]}
-- Last difficulty: {input["lastDifficulty"]}
 
-Give:
-- 3 short, actionable tips (bullets)
-- A 15–20 minute plan with concrete steps (bullets)
-""".strip()
+def tips_facts(data: dict) -> str:
+    """Student summary from a bucketed profile (see tips_profile)"""
+    return f"""Student summary:
+- Module: {data["module"]}
+- Score: {data["score"]}
+- Missed low-frequency words: {data["missedLowFreq"]}
+- Similar-choice errors: {data["similarChoiceErrors"]}
+- Last difficulty: {data["lastDifficulty"]}"""
 
 
-def redefine_prompt(input: dict) -> str:
-    return f"""
-Rewrite the definition and examples for Filipino word "{input["word"]}".
+def tips_messages(profile: Dict[str, str]) -> List[dict]:
+    """Chat messages for a tips profile"""
+    return chat_messages(TIPS_SYSTEM_PROMPT, TIPS_INSTRUCTIONS, tips_facts(profile))
 
-Base meaning: {input["baseMeaning"]}
-Base example: {input["example"]}
+
+# ============================================================
+# REDEFINE
+# ============================================================
+
+REDEFINE_INSTRUCTIONS = """Rewrite the definition and examples for the Filipino word given.
 
 Return:
-- Easy definition (casual, English)
-- Brief formal definition (academic, Filipino)
+- Easy definition (casual, must be in English)
+- Brief formal definition (academic, must be in Filipino)
 - 2 new example sentences (Filipino)
-- 1 short bilingual gloss
-""".strip()
+- 1 short bilingual gloss (Filipino)"""
+
+
+def redefine_facts(data: dict) -> str:
+    """Word, base meaning and example to rewrite"""
+    return f"""Word: "{data["word"]}"
+Base meaning: {data["baseMeaning"]}
+Base example: {data["example"]}"""
+
+
+def redefine_messages(data: dict) -> List[dict]:
+    """Chat messages for a redefine request"""
+    return chat_messages(REDEFINE_SYSTEM_PROMPT, REDEFINE_INSTRUCTIONS, redefine_facts(data))
+
+
+# ============================================================
+# TIPS PROFILES
+# ============================================================
+
+# Raw tips inputs are quantized so that tips are generated once per bucket
+SCORE_BANDS = [(40, "below 40%"), (60, "40–59%"), (75, "60–74%"), (90, "75–89%"), (101, "90–100%")]
+ERROR_BANDS = [(1, "none"), (3, "1–2"), (None, "3 or more")]
+DIFFICULTIES = ("easy", "medium", "hard")
+MODULES = ("vocabulary", "grammar", "sentence-construction", "reading-comprehension")
+
+
+def _band(value: int, bands) -> str:
+    for limit, label in bands:
+        if limit is None or value < limit:
+            return label
+    return bands[-1][1]
+
+
+def tips_profile(data: dict) -> Dict[str, str]:
+    """Bucketed tips inputs; unknown difficulties and modules fall back to medium / vocabulary"""
+    difficulty = str(data["lastDifficulty"]).strip().lower()
+    module = str(data.get("module") or "").strip().lower()
+    return {
+        "score": _band(data["score"], SCORE_BANDS),
+        "missedLowFreq": _band(data["missedLowFreq"], ERROR_BANDS),
+        "similarChoiceErrors": _band(data["similarChoiceErrors"], ERROR_BANDS),
+        "lastDifficulty": difficulty if difficulty in DIFFICULTIES else "medium",
+        "module": module if module in MODULES else "vocabulary",
+    }
+
+
+def all_tips_profiles() -> List[Dict[str, str]]:
+    """Every tips bucket"""
+    return [
+        {
+            "score": score,
+            "missedLowFreq": missed,
+            "similarChoiceErrors": similar,
+            "lastDifficulty": difficulty,
+            "module": module,
+        }
+        for (_, score), (_, missed), (_, similar), difficulty, module in product(
+            SCORE_BANDS, ERROR_BANDS, ERROR_BANDS, DIFFICULTIES, MODULES
+        )
+    ]
+
+
+# ============================================================
+# VERSIONS
+# ============================================================
+
+def rendered(messages: List[dict]) -> str:
+    """Messages as one string, for fingerprinting"""
+    return "\x00".join(f'{m["role"]}:{m["content"]}' for m in messages)
+
+
+# Each changes whenever its template text or the prompt layout changes
+EXPLAIN_PROMPT_VERSION = template_version(lambda data: rendered(explanation_messages(data)), [
+    {"mode": mode, "word": "{word}", "correct": "{correct}", "selected": "{selected}",
+     "definition": "{definition}", "example": "{example}", "lexicon": "{lexicon}"}
+    for mode in ("quiz", "fill-blanks")
+])
+
+
+TIPS_PROMPT_VERSION = template_version(lambda data: rendered(tips_messages(data)), [
+    {"score": "{score}", "missedLowFreq": "{missedLowFreq}", "similarChoiceErrors": "{similarChoiceErrors}",
+     "lastDifficulty": "{lastDifficulty}", "module": "{module}"}
+])
+
+
+REDEFINE_PROMPT_VERSION = template_version(lambda data: rendered(redefine_messages(data)), [
+    {"word": "{word}", "baseMeaning": "{baseMeaning}", "example": "{example}"}
+])
@@ -0,0 +1,107 @@
+"""
+On-disk embedding matrices
+Embeddings are stored as pre-normalized float32 .npy files keyed by
+model name and a hash of the embedded texts, and loaded memory-mapped,
+so every worker process shares one copy through the page cache. Builds
+hold a file lock, so concurrent workers embed a matrix only once.
+"""
+
+import hashlib
+import os
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+import numpy as np
+
+from config import CACHE_DIR
+from locks import async_file_lock, file_lock
+
+# Inputs per embeddings request (the API accepts up to 2048)
+EMBEDDING_BATCH_SIZE = 512
+
+
+def texts_hash(texts: Sequence[str], model: str) -> str:
+    """Hash the model name and texts that make up a matrix"""
+    digest = hashlib.sha256(model.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def matrix_path(name: str, texts: Sequence[str], model: str) -> str:
+    """Path of the cached matrix for these texts"""
+    safe_model = model.replace("/", "_")
+    filename = f"{name}-{safe_model}-{texts_hash(texts, model)[:16]}.npy"
+    return os.path.join(CACHE_DIR, filename)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return a float32 copy of vectors with unit-length rows"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def load_matrix(path: str) -> Optional[np.ndarray]:
+    """Memory-map a cached matrix, or return None if it is missing"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable embedding cache {path}: {e}")
+        return None
+
+
+def save_matrix(path: str, vectors) -> np.ndarray:
+    """Normalize and atomically write a matrix, then memory-map it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, normalize_rows(vectors))
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+async def load_or_build_matrix(
+    name: str,
+    texts: Sequence[str],
+    model: str,
+    embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+) -> np.ndarray:
+    """Load the cached matrix for texts, embedding them only on a cache miss"""
+    path = matrix_path(name, texts, model)
+    matrix = load_matrix(path)
+    if matrix is not None and matrix.shape[0] == len(texts):
+        return matrix
+
+    async with async_file_lock(path):
+        # Another worker may have built it while we waited
+        matrix = load_matrix(path)
+        if matrix is not None and matrix.shape[0] == len(texts):
+            return matrix
+
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            vectors.extend(await embed(list(texts[start:start + EMBEDDING_BATCH_SIZE])))
+        return save_matrix(path, vectors)
+
+
+def load_or_build_matrix_sync(
+    path: str,
+    rows: int,
+    build: Callable[[], List[List[float]]],
+) -> np.ndarray:
+    """Blocking variant of load_or_build_matrix for a known path"""
+    matrix = load_matrix(path)
+    if matrix is not None and matrix.shape[0] == rows:
+        return matrix
+
+    with file_lock(path):
+        matrix = load_matrix(path)
+        if matrix is not None and matrix.shape[0] == rows:
+            return matrix
+        return save_matrix(path, build())
@@ -1,20 +1,44 @@
 """
 Basic RAG Implementation for Grammar References
-Uses OpenAI embeddings and simple vector search
+Uses OpenAI embeddings and vectorized search over a cached embedding matrix
 """
 
 import json
 import os
-from typing import List, Dict
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from config import EMBEDDING_MODEL
+from rag.embeddings import load_or_build_matrix_sync, matrix_path
+from rag.vector_store import VectorStore
+
+_client: Optional[OpenAI] = None
+
+def get_client() -> OpenAI:
+    """OpenAI client, created on first use"""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+# Query embeddings kept in memory (least recently used are evicted)
+QUERY_CACHE_SIZE = int(os.getenv("GRAMMAR_QUERY_CACHE_SIZE", "512"))
+
+# Rules returned by get_context_for_error
+ERROR_CONTEXT_TOP_K = 2
+
+def error_query(error_tag: str, sentence: str) -> str:
+    """Search query used for a grammar error"""
+    return f"Filipino grammar error: {error_tag}. Example: {sentence}"
 
 class GrammarRAG:
     def __init__(self):
         self.references = []
-        self.embeddings = []
+        self.index: Optional[VectorStore] = None
+        self.query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.error_results: Dict[Tuple[str, str], List[Dict]] = {}
         self.load_references()
     
     def load_references(self):
@@ -49,63 +73,103 @@ class GrammarRAG:
         print(f"✓ Loaded {len(self.references)} grammar reference chunks")
     
     def embed_references(self):
-        """Create embeddings for all references (run once)"""
-        if self.embeddings:
+        """Load reference embeddings from disk, creating them on a cache miss"""
+        if self.index is not None:
             print("Embeddings already exist")
             return
         
         texts = [ref["text"] for ref in self.references]
         
-        print(f"Creating embeddings for {len(texts)} chunks...")
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=texts
-        )
+        def build():
+            print(f"Creating embeddings for {len(texts)} chunks...")
+            response = get_client().embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts
+            )
+            print("✓ Embeddings created")
+            return [data.embedding for data in response.data]
         
-        self.embeddings = [data.embedding for data in response.data]
-        print("✓ Embeddings created")
+        path = matrix_path("grammar", texts, EMBEDDING_MODEL)
+        matrix = load_or_build_matrix_sync(path, len(texts), build)
+        self.index = VectorStore(texts, matrix)
     
-    def search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Search for relevant grammar rules"""
-        if not self.embeddings:
-            self.embed_references()
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embedding for a search query, cached in an LRU"""
+        embedding = self.query_embeddings.get(query)
+        if embedding is not None:
+            self.query_embeddings.move_to_end(query)
+            return embedding
         
-        # Get query embedding
-        query_response = client.embeddings.create(
-            model="text-embedding-3-small",
+        query_response = get_client().embeddings.create(
+            model=EMBEDDING_MODEL,
             input=query
         )
-        query_embedding = query_response.data[0].embedding
-        
-        # Calculate cosine similarities
-        similarities = []
-        for i, ref_embedding in enumerate(self.embeddings):
-            similarity = self._cosine_similarity(query_embedding, ref_embedding)
-            similarities.append((i, similarity))
-        
-        # Sort by similarity and get top K
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        top_indices = [i for i, _ in similarities[:top_k]]
+        embedding = np.asarray(query_response.data[0].embedding, dtype=np.float32)
+        self._remember_query(query, embedding)
+        return embedding
+    
+    def _remember_query(self, query: str, embedding: np.ndarray):
+        self.query_embeddings[query] = embedding
+        self.query_embeddings.move_to_end(query)
+        while len(self.query_embeddings) > QUERY_CACHE_SIZE:
+            self.query_embeddings.popitem(last=False)
+    
+    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        """Search for relevant grammar rules"""
+        return self.search_by_vector(self.embed_query(query), top_k)
+    
+    def search_by_vector(self, query_embedding, top_k: int = 3) -> List[Dict]:
+        """Search for relevant grammar rules with an already embedded query"""
+        if self.index is None:
+            self.embed_references()
         
-        # Return top references
+        # Return top references with their own similarity scores
         results = []
-        for idx in top_indices:
+        for idx, score in self.index.top_k_positions(query_embedding, top_k):
             ref = self.references[idx].copy()
-            ref["similarity_score"] = similarities[idx][1]
+            ref["similarity_score"] = score
             results.append(ref)
         
         return results
     
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
-        a = np.array(a)
-        b = np.array(b)
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    def precompute_error_contexts(self):
+        """Precompute retrieval results for every (errorTag, sentence) in grammar_data
+        
+        Query embeddings for the dataset are cached on disk like the
+        reference matrix, so after the first run this needs no network.
+        """
+        from data.grammar_core import grammar_data
+        
+        pairs = list(dict.fromkeys(
+            (item["errorTag"], item["sentence"])
+            for item in grammar_data
+            if item.get("errorTag") and item.get("sentence")
+        ))
+        if not pairs:
+            return
+        
+        queries = [error_query(tag, sentence) for tag, sentence in pairs]
+        
+        def build():
+            response = get_client().embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=queries
+            )
+            return [data.embedding for data in response.data]
+        
+        path = matrix_path("grammar-queries", queries, EMBEDDING_MODEL)
+        matrix = load_or_build_matrix_sync(path, len(queries), build)
+        
+        for pair, embedding in zip(pairs, matrix):
+            self.error_results[pair] = self.search_by_vector(embedding, ERROR_CONTEXT_TOP_K)
+        
+        print(f"✓ Precomputed grammar context for {len(pairs)} dataset errors")
     
     def get_context_for_error(self, error_tag: str, sentence: str) -> str:
         """Get relevant context for a grammar error"""
-        query = f"Filipino grammar error: {error_tag}. Example: {sentence}"
-        results = self.search(query, top_k=2)
+        results = self.error_results.get((error_tag, sentence))
+        if results is None:
+            results = self.search(error_query(error_tag, sentence), top_k=ERROR_CONTEXT_TOP_K)
         
         context = "Relevant Grammar Rules:\n\n"
         for i, result in enumerate(results, 1):
@@ -126,6 +190,7 @@ def get_grammar_rag() -> GrammarRAG:
     if _grammar_rag is None:
         _grammar_rag = GrammarRAG()
         _grammar_rag.embed_references()
+        _grammar_rag.precompute_error_contexts()
     return _grammar_rag
 
 # Example usage
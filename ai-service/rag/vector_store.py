@@ -0,0 +1,71 @@
+"""
+Vectorized nearest-neighbour search over a normalized embedding matrix
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag.embeddings import normalize_rows
+
+
+class VectorStore:
+    """Keys paired with unit-length embedding rows"""
+
+    def __init__(self, keys: Sequence[str], matrix: np.ndarray):
+        if len(keys) != matrix.shape[0]:
+            raise ValueError(f"{len(keys)} keys for {matrix.shape[0]} vectors")
+        self.keys = list(keys)
+        self.matrix = matrix
+        self._positions: Dict[str, int] = {}
+        for i, key in enumerate(self.keys):
+            self._positions.setdefault(key, i)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def position(self, key: str) -> Optional[int]:
+        """Row of a key in the matrix"""
+        return self._positions.get(key)
+
+    def vector(self, key: str) -> Optional[np.ndarray]:
+        """Stored (normalized) vector for a key"""
+        i = self._positions.get(key)
+        return None if i is None else self.matrix[i]
+
+    def scores(self, query) -> np.ndarray:
+        """Cosine similarity of query against every row"""
+        return self.matrix @ normalize_rows(query)[0]
+
+    def top_k_positions(
+        self,
+        query,
+        k: int,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[int, float]]:
+        """Return the k best (row, score) pairs, best first"""
+        scores = np.array(self.scores(query), dtype=np.float32)
+        for key in exclude:
+            i = self._positions.get(key)
+            if i is not None:
+                scores[i] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def top_k(
+        self,
+        query,
+        k: int,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[str, float]]:
+        """Return the k best (key, score) pairs, best first"""
+        return [(self.keys[i], score) for i, score in self.top_k_positions(query, k, exclude)]
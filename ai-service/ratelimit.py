@@ -0,0 +1,226 @@
+"""
+Token-bucket rate limiting
+Per-user, per-endpoint buckets count requests and estimated prompt tokens;
+a global budget keeps upstream traffic under the provider's limits by
+briefly queueing calls and shedding them when the wait would be too long
+"""
+
+import asyncio
+import hmac
+import math
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from config import (
+    AI_SERVICE_SHARED_SECRET,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_FORWARDED_HOPS,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_TRUSTED_PROXIES,
+    RATE_LIMIT_USER_RPM,
+    RATE_LIMIT_USER_TPM,
+    UPSTREAM_MAX_QUEUE_WAIT,
+    UPSTREAM_RPM,
+    UPSTREAM_TPM,
+    endpoint_setting,
+)
+from metrics import (
+    RATE_LIMIT_KEYS,
+    RATE_LIMITED,
+    REGISTRY,
+    UPSTREAM_BUDGET,
+    UPSTREAM_QUEUE_WAIT,
+)
+
+# Caller identity for the current request, set by the rate_limit dependency
+current_user: ContextVar[Optional[str]] = ContextVar("current_user", default=None)
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, retry_after: float, detail: str = "Too many requests"):
+        super().__init__(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled at `rate` tokens per second"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: Optional[float] = None):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until amount tokens are available (0 if they are now)"""
+        self._refill(time.monotonic() if now is None else now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+    def try_take(self, amount: float, now: Optional[float] = None) -> float:
+        """Take amount tokens; return 0 on success, else seconds until they would be available"""
+        wait = self.wait_time(amount, now)
+        if not wait:
+            self.tokens -= min(amount, self.capacity)
+        return wait
+
+    def available(self, now: Optional[float] = None) -> float:
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens
+
+
+def per_minute_bucket(limit: float) -> TokenBucket:
+    return TokenBucket(capacity=limit, rate=limit / 60)
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """Rough prompt-token estimate (~4 characters per token)"""
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4 + 4 * len(messages)
+
+
+class RateLimiter:
+    def __init__(self):
+        self.enabled = RATE_LIMIT_ENABLED
+        self._user_buckets: "OrderedDict[Tuple[str, str, str], TokenBucket]" = OrderedDict()
+        self.upstream_requests = per_minute_bucket(UPSTREAM_RPM)
+        self.upstream_tokens = per_minute_bucket(UPSTREAM_TPM)
+
+    def _user_bucket(self, user: str, endpoint: str, kind: str) -> TokenBucket:
+        key = (user, endpoint, kind)
+        bucket = self._user_buckets.get(key)
+        if bucket is None:
+            if kind == "requests":
+                limit = int(endpoint_setting("RATE_LIMIT_USER_RPM", endpoint, str(RATE_LIMIT_USER_RPM)))
+            else:
+                limit = int(endpoint_setting("RATE_LIMIT_USER_TPM", endpoint, str(RATE_LIMIT_USER_TPM)))
+            bucket = self._user_buckets[key] = per_minute_bucket(limit)
+            while len(self._user_buckets) > RATE_LIMIT_MAX_KEYS:
+                self._user_buckets.popitem(last=False)
+        self._user_buckets.move_to_end(key)
+        return bucket
+
+    def check_request(self, user: str, endpoint: str):
+        """Count one request against the user's bucket for an endpoint"""
+        if not self.enabled:
+            return
+        wait = self._user_bucket(user, endpoint, "requests").try_take(1)
+        if wait:
+            RATE_LIMITED.inc(endpoint=endpoint, limit="user_requests")
+            raise RateLimitExceeded(wait)
+
+    def charge_tokens(self, endpoint: str, tokens: int):
+        """Count estimated prompt tokens against the current user's bucket
+
+        Charged once per caller before any shared upstream work, so a
+        coalesced call never fails (or goes free) on another user's budget.
+        """
+        user = current_user.get()
+        if not self.enabled or user is None:
+            return
+        wait = self._user_bucket(user, endpoint, "tokens").try_take(tokens)
+        if wait:
+            RATE_LIMITED.inc(endpoint=endpoint, limit="user_tokens")
+            raise RateLimitExceeded(wait)
+
+    async def acquire_upstream(self, endpoint: str, tokens: int):
+        """Reserve global upstream budget for one call, queueing briefly if needed"""
+        if not self.enabled:
+            return
+
+        waited = 0.0
+        while True:
+            wait = max(
+                self.upstream_requests.wait_time(1),
+                self.upstream_tokens.wait_time(tokens),
+            )
+            if not wait:
+                self.upstream_requests.try_take(1)
+                self.upstream_tokens.try_take(tokens)
+                break
+            if waited + wait > UPSTREAM_MAX_QUEUE_WAIT:
+                RATE_LIMITED.inc(endpoint=endpoint, limit="upstream")
+                raise RateLimitExceeded(wait, detail="Upstream capacity exhausted, retry later")
+            await asyncio.sleep(wait)
+            waited += wait
+
+        if waited:
+            UPSTREAM_QUEUE_WAIT.observe(waited, endpoint=endpoint)
+
+    @property
+    def tracked_keys(self) -> int:
+        return len(self._user_buckets)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "enabled": self.enabled,
+            "tracked_keys": self.tracked_keys,
+            "upstream_requests_available": round(self.upstream_requests.available(), 1),
+            "upstream_tokens_available": round(self.upstream_tokens.available(), 1),
+        }
+
+
+limiter = RateLimiter()
+
+
+def trusted_caller(request: Request) -> bool:
+    """Whether the caller may speak for someone else (a known proxy or the shared secret)"""
+    if request.client and request.client.host in RATE_LIMIT_TRUSTED_PROXIES:
+        return True
+    token = request.headers.get("x-service-token", "")
+    return bool(AI_SERVICE_SHARED_SECRET) and hmac.compare_digest(
+        token.encode(), AI_SERVICE_SHARED_SECRET.encode()
+    )
+
+
+def forwarded_address(header: str, hops: int = RATE_LIMIT_FORWARDED_HOPS) -> Optional[str]:
+    """The X-Forwarded-For entry appended by our own outermost trusted hop"""
+    entries = [entry.strip() for entry in header.split(",") if entry.strip()]
+    if hops < 1 or len(entries) < hops:
+        return None
+    return entries[-hops]
+
+
+def client_id(request: Request) -> str:
+    """Identify the caller: X-User-Id or the forwarded IP from a trusted proxy, else the client IP"""
+    if trusted_caller(request):
+        user = request.headers.get("x-user-id")
+        if user:
+            return f"user:{user}"
+        forwarded = forwarded_address(request.headers.get("x-forwarded-for", ""))
+        if forwarded:
+            return f"ip:{forwarded}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(endpoint: str):
+    """FastAPI dependency enforcing the per-user request limit for an endpoint"""
+    async def dependency(request: Request):
+        user = client_id(request)
+        current_user.set(user)
+        limiter.check_request(user, endpoint)
+    return dependency
+
+
+def collect_limiter_metrics():
+    UPSTREAM_BUDGET.set(limiter.upstream_requests.available(), kind="requests")
+    UPSTREAM_BUDGET.set(limiter.upstream_tokens.available(), kind="tokens")
+    RATE_LIMIT_KEYS.set(limiter.tracked_keys)
+
+REGISTRY.add_collector(collect_limiter_metrics)
@@ -0,0 +1,229 @@
+"""
+Upstream call resilience
+Wraps each upstream call in a per-endpoint deadline, retries transient
+failures with full-jitter exponential backoff, optionally hedges slow
+calls with a second request, and trips a per-endpoint circuit breaker
+during provider outages so callers fail fast and serve fallbacks.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import openai
+
+from config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+    UPSTREAM_DEADLINE,
+    UPSTREAM_HEDGE,
+    UPSTREAM_HEDGE_MIN_SAMPLES,
+    UPSTREAM_HEDGE_PERCENTILE,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_RETRY_BASE,
+    UPSTREAM_RETRY_CAP,
+    endpoint_setting,
+)
+from metrics import BREAKER_STATE, REGISTRY, UPSTREAM_HEDGES, UPSTREAM_RETRIES
+
+T = TypeVar("T")
+
+# Latency samples kept per endpoint for the hedging percentile
+LATENCY_WINDOW = 200
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream call did not succeed in time; callers should fall back"""
+
+    def __init__(self, endpoint: str, reason: str, cause: Optional[BaseException] = None):
+        super().__init__(f"{endpoint}: upstream unavailable ({reason})" + (f": {cause}" if cause else ""))
+        self.endpoint = endpoint
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after a cooldown"""
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that says nothing about provider health (e.g. a local 429)"""
+        self._trial_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, Deque[float]] = {}
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+    return breaker
+
+
+def endpoint_deadline(endpoint: str) -> float:
+    """Total time budget for one upstream call, retries included (UPSTREAM_DEADLINE_<ENDPOINT>)"""
+    return float(endpoint_setting("UPSTREAM_DEADLINE", endpoint, str(UPSTREAM_DEADLINE)))
+
+
+def observe_latency(endpoint: str, seconds: float):
+    _latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def latency_percentile(endpoint: str, pct: float) -> Optional[float]:
+    """Rolling latency percentile, or None until enough samples exist"""
+    samples = _latencies.get(endpoint)
+    if not samples or len(samples) < UPSTREAM_HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429s and 5xx responses"""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def backoff_delay(retry: int) -> float:
+    """Full jitter: uniform between 0 and the capped exponential step"""
+    return random.uniform(0, min(UPSTREAM_RETRY_CAP, UPSTREAM_RETRY_BASE * 2 ** retry))
+
+
+async def _hedged(endpoint: str, attempt: Callable[[float], Awaitable[T]], remaining: float) -> T:
+    """Run attempt; if it outlasts the latency percentile, race a second one"""
+    delay = latency_percentile(endpoint, UPSTREAM_HEDGE_PERCENTILE)
+    if delay is None or delay >= remaining:
+        return await attempt(remaining)
+
+    first = asyncio.ensure_future(attempt(remaining))
+    pending = {first}
+    error: Optional[BaseException] = None
+    try:
+        # Inside the try, so a cancelled caller also cancels the first attempt
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+
+        UPSTREAM_HEDGES.inc(endpoint=endpoint)
+        pending.add(asyncio.ensure_future(attempt(remaining - delay)))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_upstream(
+    endpoint: str,
+    operation: str,
+    attempt: Callable[[float], Awaitable[T]],
+    hedge: bool = False,
+) -> T:
+    """Run attempt(timeout) under the endpoint's deadline, retries and circuit breaker
+
+    Raises UpstreamUnavailable when the breaker is open, the deadline
+    passes or retries run out; other errors propagate unchanged.
+    """
+    breaker = get_breaker(endpoint)
+    deadline = time.monotonic() + endpoint_deadline(endpoint)
+    last_error: Optional[BaseException] = None
+
+    for retry in range(UPSTREAM_MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise UpstreamUnavailable(endpoint, "circuit_open", last_error)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            breaker.release()
+            raise UpstreamUnavailable(endpoint, "deadline", last_error)
+
+        started = time.monotonic()
+        try:
+            if hedge and UPSTREAM_HEDGE:
+                result = await _hedged(endpoint, attempt, remaining)
+            else:
+                result = await attempt(remaining)
+        except Exception as e:
+            if not is_retryable(e):
+                # A 4xx still proves the provider is up
+                if isinstance(e, openai.APIStatusError):
+                    breaker.record_success()
+                else:
+                    breaker.release()
+                raise
+            breaker.record_failure()
+            last_error = e
+        except BaseException:
+            # Cancelled (e.g. the client went away): free a half-open trial slot
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            observe_latency(endpoint, time.monotonic() - started)
+            return result
+
+        if retry < UPSTREAM_MAX_RETRIES:
+            delay = backoff_delay(retry)
+            if time.monotonic() + delay >= deadline:
+                break
+            UPSTREAM_RETRIES.inc(endpoint=endpoint, operation=operation)
+            await asyncio.sleep(delay)
+
+    raise UpstreamUnavailable(endpoint, "retries_exhausted", last_error)
+
+
+def stats() -> Dict[str, dict]:
+    return {
+        endpoint: {"state": breaker.state, "failures": breaker.failures}
+        for endpoint, breaker in _breakers.items()
+    }
+
+
+def collect_breaker_metrics():
+    levels = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+    for endpoint, breaker in _breakers.items():
+        BREAKER_STATE.set(levels[breaker.state], endpoint=endpoint)
+
+REGISTRY.add_collector(collect_breaker_metrics)
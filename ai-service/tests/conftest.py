@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service imports its modules top-level (run from ai-service/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from data.lexicon import Lexicon, PackedTrie
+
+WORDS = ["bagay", "bahay", "baga", "buhay", "kain", "kumain", "kinain", "mag-aral", "maganda", "naghanda"]
+
+
+def dp_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def random_words(count, seed):
+    rng = random.Random(seed)
+    return sorted({
+        "".join(rng.choice("abgkmn") for _ in range(rng.randint(1, 7)))
+        for _ in range(count)
+    })
+
+
+def test_membership_and_iteration():
+    trie = PackedTrie.build(WORDS)
+    assert len(trie) == len(WORDS)
+    assert list(trie) == sorted(WORDS)
+    assert "bahay" in trie and "mag-aral" in trie
+    assert "bah" not in trie and "bahayan" not in trie
+
+
+def test_saved_trie_loads_memory_mapped(tmp_path):
+    path = str(tmp_path / "words.trie")
+    PackedTrie.build(WORDS).save(path)
+    trie = PackedTrie.load(path)
+    assert list(trie) == sorted(WORDS)
+    assert trie.fuzzy("bahai", 1) == PackedTrie.build(WORDS).fuzzy("bahai", 1)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+def test_fuzzy_matches_brute_force_levenshtein(max_distance):
+    words = random_words(500, seed=1)
+    trie = PackedTrie.build(words)
+    for query in random_words(40, seed=2) + words[:10]:
+        expected = sorted(
+            ((w, dp_levenshtein(query, w)) for w in words if dp_levenshtein(query, w) <= max_distance),
+            key=lambda item: (item[1], item[0]),
+        )
+        assert trie.fuzzy(query, max_distance) == expected
+
+
+def test_is_typo_of_the_closest_spelling():
+    lexicon = Lexicon.from_words(WORDS)
+    assert lexicon.is_typo_of("bagai", "bagay")
+    assert lexicon.is_typo_of("Kumaen", "kumain")
+
+
+def test_is_typo_of_rejects_valid_words_and_farther_spellings():
+    lexicon = Lexicon.from_words(WORDS)
+    # A known word is never a typo, even one edit from the answer
+    assert not lexicon.is_typo_of("bahay", "bagay")
+    # "bagy" is one edit from "baga" and "bagay"; "buhay" is farther away
+    assert lexicon.is_typo_of("bagy", "baga") and lexicon.is_typo_of("bagy", "bagay")
+    assert not lexicon.is_typo_of("bagy", "buhay")
+    assert not lexicon.is_typo_of("xyzxyz", "bagay")
+
+
+def test_verdict_wording_depends_on_authority():
+    partial = Lexicon.from_words(WORDS).check("bagai")
+    complete = Lexicon.from_words(WORDS, authoritative=True).check("bagai")
+    assert partial.near == complete.near and partial.near[0] in ("baga", "bagay")
+    assert "incomplete" in partial.describe()
+    assert "near-miss spelling" in complete.describe()
+    assert Lexicon.from_words(WORDS).check("maganda").describe() == '"maganda" is a known Filipino word.'
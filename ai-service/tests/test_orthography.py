@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from data.orthography import BKTree, OrthographicEngine, TrigramIndex, dice, levenshtein, trigrams
+
+WORDS = [
+    "kumain", "kinain", "kain", "kakain", "kainan", "bahay", "bagay", "buhay",
+    "maganda", "masigasig", "masikap", "mabait", "sulat", "sumulat", "dagat", "ulan",
+]
+
+
+def test_inflections_of_the_same_root_rank_first():
+    engine = OrthographicEngine(WORDS)
+    assert {w for w, _ in engine.similar("kumain", 3)} == {"kain", "kakain", "kinain"}
+    assert engine.similar("sulat", 1)[0][0] == "sumulat"
+
+
+def test_look_alike_misspelling_ranks_its_word_first():
+    engine = OrthographicEngine(WORDS)
+    # e/i is a cheap substitution
+    assert engine.similar("kumaen", 1)[0][0] == "kumain"
+
+
+def test_candidates_are_capped_by_trigram_similarity():
+    syllables = [c + v for c in "bdgklmnpst" for v in "aiou"]
+    words = [f"ma{a}{b}" for a in syllables for b in syllables]
+    engine = OrthographicEngine(words, max_candidates=10)
+
+    candidates = engine.candidates("maganda")
+    assert len(candidates) == 10
+    # Every ma- word shares a trigram with the query; the kept ones are the best
+    kept = min(candidates.values())
+    uncapped = OrthographicEngine(words, max_candidates=len(words)).candidates("maganda")
+    assert len(uncapped) > 100
+    assert sorted(uncapped.values(), reverse=True)[:10] == sorted(candidates.values(), reverse=True)
+    assert all(score <= kept for word, score in uncapped.items() if word not in candidates)
+
+
+def random_words(count, seed):
+    rng = random.Random(seed)
+    syllables = [c + v for c in "bgklmnst" for v in "aiu"]
+    return sorted({
+        rng.choice(["", "ma", "nag", "i"]) + "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    })
+
+
+def dp_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def test_levenshtein_matches_dynamic_programming():
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choice("abn-") for _ in range(rng.randint(0, 10)))
+        b = "".join(rng.choice("abn-") for _ in range(rng.randint(0, 10)))
+        assert levenshtein(a, b) == dp_levenshtein(a, b), (a, b)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_bk_tree_search_matches_brute_force(max_distance):
+    words = random_words(400, seed=1)
+    tree = BKTree(words)
+    for query in random_words(30, seed=2) + words[:10]:
+        expected = {(w, dp_levenshtein(query, w)) for w in words if dp_levenshtein(query, w) <= max_distance}
+        assert set(tree.search(query, max_distance)) == expected
+
+
+def test_trigram_search_matches_brute_force():
+    words = random_words(400, seed=3) + ["sasasa", "masasa"]
+    index = TrigramIndex(words)
+    for query in random_words(30, seed=4) + ["sasa"]:
+        expected = {}
+        for word in words:
+            similarity = dice(trigrams(query), trigrams(word))
+            if similarity >= 0.2:
+                expected[word] = similarity
+        found = dict(index.search(query))
+        assert found.keys() == expected.keys()
+        assert all(found[w] == pytest.approx(expected[w]) for w in found)
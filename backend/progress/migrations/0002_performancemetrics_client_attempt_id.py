@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performancemetrics',
+            name='client_attempt_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='performancemetrics',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_attempt_id__isnull', False)), fields=('exercise_progress', 'client_attempt_id'), name='unique_client_attempt_per_exercise'),
+        ),
+    ]
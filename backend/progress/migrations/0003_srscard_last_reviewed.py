@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_performancemetrics_client_attempt_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='srscard',
+            name='last_reviewed',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -131,6 +132,9 @@ class PerformanceMetrics(models.Model):
     # Error tags for adaptive learning
     error_tags = models.JSONField(default=list)
     
+    # Client-generated ID, so resubmitted attempts are recorded once
+    client_attempt_id = models.CharField(max_length=64, null=True, blank=True)
+    
     # Timestamp
     timestamp = models.DateTimeField(auto_now_add=True)
     
@@ -140,6 +144,13 @@ class PerformanceMetrics(models.Model):
             models.Index(fields=['exercise_progress', 'timestamp']),
             models.Index(fields=['difficulty']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exercise_progress', 'client_attempt_id'],
+                condition=models.Q(client_attempt_id__isnull=False),
+                name='unique_client_attempt_per_exercise',
+            ),
+        ]
         ordering = ['-timestamp']
     
     def __str__(self):
@@ -160,7 +171,8 @@ class SRSCard(models.Model):
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
-    last_reviewed = models.DateTimeField(auto_now=True)
+    # Set by each review (not auto_now, so batched reviews keep their own time)
+    last_reviewed = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'srs_cards'
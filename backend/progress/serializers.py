@@ -11,9 +11,16 @@ class PerformanceMetricsSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'timestamp']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        """`fields` limits the output to a subset of Meta.fields"""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.Meta.fields) - set(fields):
+                self.fields.pop(name, None)
+
 
 class ExerciseProgressSerializer(serializers.ModelSerializer):
-    performance_history = PerformanceMetricsSerializer(many=True, read_only=True)
+    performance_history = serializers.SerializerMethodField()
     
     class Meta:
         model = ExerciseProgress
@@ -25,6 +32,13 @@ class ExerciseProgressSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def get_performance_history(self, obj):
+        # Capped history prefetched by the progress views; full relation otherwise
+        history = getattr(obj, 'recent_history', None)
+        if history is None:
+            history = obj.performance_history.all()
+        return PerformanceMetricsSerializer(history, many=True).data
+
 
 class ModuleProgressSerializer(serializers.ModelSerializer):
     exercises = ExerciseProgressSerializer(many=True, read_only=True)
@@ -39,6 +53,20 @@ class ModuleProgressSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class AttemptSerializer(serializers.Serializer):
+    """One attempt in a bulk submission (camelCase, like the update endpoint)"""
+    clientAttemptId = serializers.CharField(max_length=64)
+    module = serializers.ChoiceField(choices=ModuleProgress.MODULE_CHOICES)
+    exerciseType = serializers.ChoiceField(choices=ExerciseProgress.EXERCISE_TYPES)
+    difficulty = serializers.ChoiceField(choices=['easy', 'medium', 'hard'], default='easy')
+    score = serializers.IntegerField(min_value=0, max_value=100)
+    missedLowFreq = serializers.IntegerField(min_value=0, default=0)
+    similarChoiceErrors = serializers.IntegerField(min_value=0, default=0)
+    errorTags = serializers.ListField(child=serializers.CharField(), default=list)
+    status = serializers.ChoiceField(choices=ExerciseProgress.STATUS_CHOICES, required=False)
+    completedAt = serializers.DateTimeField(required=False)
+
+
 class SRSCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = SRSCard
@@ -49,6 +77,13 @@ class SRSCardSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'last_reviewed']
 
 
+class SRSReviewSerializer(serializers.Serializer):
+    """One result in a review session; reviewed_at defaults to the time of submission"""
+    word_id = serializers.IntegerField()
+    grade = serializers.IntegerField(min_value=0, max_value=5)
+    reviewed_at = serializers.DateTimeField(required=False)
+
+
 class ReviewDeckSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReviewDeck
@@ -1,3 +1,250 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import ExerciseProgress, ModuleProgress, PerformanceMetrics, SRSCard
+
+User = get_user_model()
+
+
+class UpdateExerciseProgressTests(TestCase):
+    """update_exercise_progress: atomic upsert with a fixed query budget"""
+
+    # Savepoints for the view's atomic blocks count as queries inside TestCase
+    FIRST_UPDATE_QUERIES = 14
+    UPDATE_QUERIES = 9
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('update_exercise_progress', args=['vocabulary', 'quiz'])
+
+    def post(self, **data):
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def payload(self, score=80, attempts=1, **extra):
+        return {
+            'status': 'in-progress',
+            'score': score,
+            'attempts': attempts,
+            'lastDifficulty': 'medium',
+            'performanceMetrics': {
+                'difficulty': 'medium',
+                'score': score,
+                'missedLowFreq': 1,
+                'similarChoiceErrors': 2,
+                'errorTags': ['affix'],
+            },
+            **extra,
+        }
+
+    def test_first_update_creates_rows_within_budget(self):
+        with self.assertNumQueries(self.FIRST_UPDATE_QUERIES):
+            data = self.post(**self.payload())
+
+        self.assertEqual(data['best_score'], 80)
+        self.assertEqual(data['attempts'], 1)
+        self.assertIsNotNone(data['first_attempt_at'])
+        self.assertEqual(len(data['performance_history']), 1)
+
+    def test_update_of_existing_exercise_within_budget(self):
+        self.post(**self.payload())
+        for attempt in range(2, 5):
+            with self.assertNumQueries(self.UPDATE_QUERIES):
+                self.post(**self.payload(score=60, attempts=attempt))
+
+    def test_budget_does_not_grow_with_history_or_exercises(self):
+        self.post(**self.payload())
+        exercise = ExerciseProgress.objects.get(exercise_type='quiz')
+        PerformanceMetrics.objects.bulk_create([
+            PerformanceMetrics(exercise_progress=exercise, difficulty='easy', score=i) for i in range(50)
+        ])
+        for exercise_type in ('flashcards', 'fill-blanks'):
+            ExerciseProgress.objects.create(module_progress=exercise.module_progress, exercise_type=exercise_type)
+
+        with self.assertNumQueries(self.UPDATE_QUERIES):
+            self.post(**self.payload(attempts=2))
+
+    def test_best_score_and_attempts_never_decrease(self):
+        self.post(**self.payload(score=90, attempts=3))
+        data = self.post(**self.payload(score=40, attempts=2))
+
+        self.assertEqual(data['last_score'], 40)
+        self.assertEqual(data['best_score'], 90)
+        self.assertEqual(data['attempts'], 3)
+
+    def test_completion_percentage(self):
+        self.post(**self.payload())
+        for exercise_type in ('flashcards', 'fill-blanks', 'quiz'):
+            url = reverse('update_exercise_progress', args=['vocabulary', exercise_type])
+            status = 'completed' if exercise_type != 'fill-blanks' else 'in-progress'
+            self.client.post(url, {'status': status}, format='json')
+
+        module = ModuleProgress.objects.get(user=self.user, module='vocabulary')
+        self.assertEqual(module.completion_percentage, 66)
+        self.assertIsNotNone(module.last_accessed_at)
+
+    def test_omitted_fields_are_left_unchanged(self):
+        self.post(**self.payload(completedAt='2026-01-02T03:04:05Z'))
+        data = self.post(score=70)
+
+        self.assertEqual(data['status'], 'in-progress')
+        self.assertEqual(data['last_difficulty'], 'medium')
+        self.assertEqual(data['attempts'], 1)
+        self.assertTrue(data['last_completed_at'].startswith('2026-01-02T03:04:05'))
+
+
+class SubmitAttemptsTests(TestCase):
+    """submit_attempts: bulk insert, once-per-key updates and duplicate detection"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('submit_attempts')
+
+    def attempt(self, attempt_id, module='vocabulary', exercise_type='quiz', score=50, **extra):
+        return {
+            'clientAttemptId': attempt_id,
+            'module': module,
+            'exerciseType': exercise_type,
+            'difficulty': 'medium',
+            'score': score,
+            **extra,
+        }
+
+    def post(self, attempts):
+        return self.client.post(self.url, {'attempts': attempts}, format='json')
+
+    def test_batch_updates_each_exercise_once(self):
+        response = self.post([
+            self.attempt('a1', score=40),
+            self.attempt('a2', score=90),
+            self.attempt('a3', score=70, status='completed'),
+            self.attempt('b1', module='grammar', exercise_type='fill-blanks', score=60),
+        ])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['recorded'], 4)
+        self.assertEqual(response.data['duplicates'], [])
+
+        quiz = ExerciseProgress.objects.get(module_progress__module='vocabulary', exercise_type='quiz')
+        self.assertEqual((quiz.attempts, quiz.best_score, quiz.last_score, quiz.status), (3, 90, 70, 'completed'))
+        self.assertEqual(PerformanceMetrics.objects.filter(exercise_progress=quiz).count(), 3)
+        self.assertEqual(
+            ModuleProgress.objects.get(user=self.user, module='vocabulary').completion_percentage, 100
+        )
+        self.assertEqual({m['module'] for m in response.data['modules']}, {'vocabulary', 'grammar'})
+
+    def test_resent_attempts_are_recorded_once(self):
+        self.post([self.attempt('a1'), self.attempt('a2')])
+        response = self.post([self.attempt('a2'), self.attempt('a3'), self.attempt('a3')])
+
+        self.assertEqual(response.data['recorded'], 1)
+        self.assertEqual(response.data['duplicates'], ['a2', 'a3'])
+        self.assertEqual(PerformanceMetrics.objects.count(), 3)
+        self.assertEqual(ExerciseProgress.objects.get(exercise_type='quiz').attempts, 3)
+
+    def test_attempts_agree_with_single_updates(self):
+        single_url = reverse('update_exercise_progress', args=['vocabulary', 'quiz'])
+        self.client.post(single_url, {
+            'attempts': 1, 'score': 50, 'performanceMetrics': {'score': 50}
+        }, format='json')
+        self.post([self.attempt('a1'), self.attempt('a2')])
+        quiz = ExerciseProgress.objects.get(exercise_type='quiz')
+        self.assertEqual(quiz.attempts, 3)
+
+        # The client reports history length + 1, which the bulk count already covers
+        self.client.post(single_url, {'attempts': 3, 'score': 60}, format='json')
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.attempts, 3)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.post([self.attempt('warmup')])
+        batches = [
+            [self.attempt(f'{size}-{i}', exercise_type=('quiz', 'flashcards')[i % 2]) for i in range(size)]
+            for size in (2, 40)
+        ]
+        with CaptureQueriesContext(connection) as small:
+            self.post(batches[0])
+        with CaptureQueriesContext(connection) as large:
+            self.post(batches[1])
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_attempts_are_rejected(self):
+        response = self.post([self.attempt('a1', module='history')])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PerformanceMetrics.objects.exists())
+
+
+class ReviewSRSSessionTests(TestCase):
+    """review_srs_session: batched SM-2 updates matching update_srs_card"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('review_srs_session')
+
+    def review(self, reviews):
+        response = self.client.post(self.url, {'reviews': reviews}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_matches_single_card_updates(self):
+        grades = [5, 4, 2, 3]
+        for grade in grades:
+            self.client.post(reverse('update_srs_card', args=[1]), {'grade': grade}, format='json')
+        single = SRSCard.objects.get(user=self.user, word_id=1)
+
+        base = timezone.now()
+        self.review([
+            {'word_id': 2, 'grade': grade, 'reviewed_at': (base + timedelta(minutes=i)).isoformat()}
+            for i, grade in enumerate(grades)
+        ])
+        batched = SRSCard.objects.get(user=self.user, word_id=2)
+
+        self.assertEqual(
+            (batched.repetitions, batched.interval, batched.easiness_factor),
+            (single.repetitions, single.interval, single.easiness_factor)
+        )
+
+    def test_reviews_apply_in_reviewed_at_order(self):
+        base = timezone.now()
+        self.review([
+            {'word_id': 1, 'grade': 1, 'reviewed_at': (base + timedelta(minutes=1)).isoformat()},
+            {'word_id': 1, 'grade': 5, 'reviewed_at': base.isoformat()},
+        ])
+        card = SRSCard.objects.get(user=self.user, word_id=1)
+
+        self.assertEqual((card.repetitions, card.interval), (0, 1))
+        self.assertEqual(card.last_reviewed, base + timedelta(minutes=1))
+
+    def test_session_query_count_does_not_grow_with_size(self):
+        self.review([{'word_id': i, 'grade': 4} for i in range(60)])
+        with CaptureQueriesContext(connection) as small:
+            self.review([{'word_id': i, 'grade': 4} for i in range(2)])
+        with CaptureQueriesContext(connection) as large:
+            self.review([{'word_id': i, 'grade': 3} for i in range(50)])
+        self.assertEqual(len(small), len(large))
+
+    def test_returns_due_queue(self):
+        SRSCard.objects.create(user=self.user, word_id=7, next_review=timezone.now() - timedelta(hours=12))
+        data = self.review([{'word_id': 1, 'grade': 0, 'reviewed_at': (timezone.now() - timedelta(days=2)).isoformat()}])
+
+        self.assertEqual(len(data['cards']), 1)
+        self.assertEqual([c['word_id'] for c in data['due_cards']], [1, 7])
+        self.assertEqual(data['due_count'], 2)
 
-# Create your tests here.
+    def test_invalid_grade_is_rejected(self):
+        response = self.client.post(self.url, {'reviews': [{'word_id': 1, 'grade': 9}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SRSCard.objects.exists())
@@ -1,27 +1,22 @@
 from django.urls import path
 from . import views
 
+# Fixed-prefix routes come first: the <module_name> patterns below would
+# otherwise also match paths like srs/1/update/ and review-deck/
 urlpatterns = [
     # Module Progress
     path('all/', views.get_all_progress, name='get_all_progress'),
-    path('<str:module_name>/', views.get_module_progress, name='get_module_progress'),
-    
-    # Exercise Progress
-    path('<str:module_name>/<str:exercise_type>/update/', 
-         views.update_exercise_progress, 
-         name='update_exercise_progress'),
     
-    path('<str:module_name>/<str:exercise_type>/history/', 
-         views.get_performance_history, 
-         name='get_performance_history'),
+    # Bulk attempt submission
+    path('attempts/bulk/', views.submit_attempts, name='submit_attempts'),
     
     # Reset Progress
     path('reset/all/', views.reset_progress, name='reset_all_progress'),
-    path('<str:module_name>/reset/', views.reset_progress, name='reset_module_progress'),
     
     # SRS Endpoints
     path('srs/all/', views.get_srs_cards, name='get_srs_cards'),
     path('srs/due/', views.get_due_srs_cards, name='get_due_srs_cards'),
+    path('srs/review/', views.review_srs_session, name='review_srs_session'),
     path('srs/<int:word_id>/update/', views.update_srs_card, name='update_srs_card'),
     path('srs/<int:word_id>/reset/', views.reset_srs_card, name='reset_srs_card'),
     
@@ -31,4 +26,16 @@ urlpatterns = [
     path('review-deck/<int:word_id>/remove/', views.remove_from_review_deck, name='remove_from_review_deck'),
     path('review-deck/<int:word_id>/update/', views.update_review_deck_item, name='update_review_deck_item'),
     path('review-deck/clear/', views.clear_review_deck, name='clear_review_deck'),
-]
\ No newline at end of file
+    
+    # Module and Exercise Progress
+    path('<str:module_name>/', views.get_module_progress, name='get_module_progress'),
+    path('<str:module_name>/reset/', views.reset_progress, name='reset_module_progress'),
+    
+    path('<str:module_name>/<str:exercise_type>/update/', 
+         views.update_exercise_progress, 
+         name='update_exercise_progress'),
+    
+    path('<str:module_name>/<str:exercise_type>/history/', 
+         views.get_performance_history, 
+         name='get_performance_history'),
+]
@@ -2,9 +2,15 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Prefetch, Q, Value, Window
+from django.db.models.functions import Coalesce, Greatest, RowNumber
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+import base64
+import binascii
 from .models import (
     ModuleProgress, 
     ExerciseProgress, 
@@ -13,26 +19,69 @@ from .models import (
     ReviewDeck
 )
 from .serializers import (
+    AttemptSerializer,
     ModuleProgressSerializer,
     ExerciseProgressSerializer,
     PerformanceMetricsSerializer,
     SRSCardSerializer,
+    SRSReviewSerializer,
     ReviewDeckSerializer
 )
 
 
+# Attempts returned per exercise in the progress tree (?history=all for every attempt)
+HISTORY_LIMIT = 10
+
+
+def history_limit(request):
+    """Per-exercise history cap from ?history=<n>|all; None means no cap"""
+    value = request.query_params.get('history')
+    if value == 'all':
+        return None
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return HISTORY_LIMIT
+
+
+def with_progress_tree(modules, limit=HISTORY_LIMIT):
+    """Prefetch exercises and their latest `limit` attempts (three queries in total)
+
+    The capped history is attached to each exercise as `recent_history`,
+    which ExerciseProgressSerializer reads instead of the full relation.
+    """
+    history = PerformanceMetrics.objects.order_by('-timestamp', '-id')
+    if limit is not None:
+        history = history.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F('exercise_progress')],
+                order_by=[F('timestamp').desc(), F('id').desc()],
+            )
+        ).filter(row_number__lte=limit)
+
+    exercises = ExerciseProgress.objects.prefetch_related(
+        Prefetch('performance_history', queryset=history, to_attr='recent_history')
+    )
+    return modules.prefetch_related(Prefetch('exercises', queryset=exercises))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_progress(request):
     """Get all module progress for current user"""
-    modules = ModuleProgress.objects.filter(user=request.user)
+    modules = with_progress_tree(
+        ModuleProgress.objects.filter(user=request.user),
+        history_limit(request)
+    )
     
     # If no progress exists, create default structure
-    if not modules.exists():
-        default_modules = ['vocabulary', 'grammar', 'sentence-construction', 'reading-comprehension']
-        for module in default_modules:
-            ModuleProgress.objects.create(user=request.user, module=module)
-        modules = ModuleProgress.objects.filter(user=request.user)
+    if not modules:
+        ModuleProgress.objects.bulk_create(
+            [ModuleProgress(user=request.user, module=module) for module, _ in ModuleProgress.MODULE_CHOICES],
+            ignore_conflicts=True
+        )
+        modules = modules.all()
     
     serializer = ModuleProgressSerializer(modules, many=True)
     return Response(serializer.data)
@@ -43,7 +92,7 @@ def get_all_progress(request):
 def get_module_progress(request, module_name):
     """Get specific module progress"""
     module = get_object_or_404(
-        ModuleProgress,
+        with_progress_tree(ModuleProgress.objects.all(), history_limit(request)),
         user=request.user,
         module=module_name
     )
@@ -51,66 +100,94 @@ def get_module_progress(request, module_name):
     return Response(serializer.data)
 
 
+def exercise_progress_changes(data, now):
+    """Field updates for an exercise from a progress payload
+
+    Returns (expressions, values): database expressions applied to an
+    existing row, and the plain values for a row created by this request.
+    attempts and best_score only ever grow, so concurrent or out-of-order
+    updates cannot move them backwards.
+    """
+    expressions = {
+        'first_attempt_at': Coalesce(F('first_attempt_at'), Value(now)),
+        'updated_at': now,
+    }
+    values = {'first_attempt_at': now}
+
+    for key, field in (
+        ('status', 'status'),
+        ('lastDifficulty', 'last_difficulty'),
+        ('completedAt', 'last_completed_at'),
+    ):
+        if data.get(key):
+            expressions[field] = values[field] = data[key]
+    if data.get('attempts') is not None:
+        attempts = int(data['attempts'])
+        expressions['attempts'] = Greatest(F('attempts'), Value(attempts))
+        values['attempts'] = attempts
+    if data.get('score') is not None:
+        score = int(data['score'])
+        expressions['last_score'] = values['last_score'] = score
+        expressions['best_score'] = Greatest(Coalesce(F('best_score'), Value(score)), Value(score))
+        values['best_score'] = score
+    return expressions, values
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_exercise_progress(request, module_name, exercise_type):
     """Update exercise progress and add performance metrics"""
     try:
-        # Get or create module progress
-        module_progress, _ = ModuleProgress.objects.get_or_create(
-            user=request.user,
-            module=module_name
-        )
-        
-        # Get or create exercise progress
-        exercise_progress, _ = ExerciseProgress.objects.get_or_create(
-            module_progress=module_progress,
-            exercise_type=exercise_type
-        )
-        
-        # Update exercise progress
         data = request.data
-        exercise_progress.status = data.get('status', exercise_progress.status)
-        exercise_progress.attempts = data.get('attempts', exercise_progress.attempts)
-        
-        if data.get('score') is not None:
-            exercise_progress.last_score = data['score']
-            # Update best score
-            if exercise_progress.best_score is None or data['score'] > exercise_progress.best_score:
-                exercise_progress.best_score = data['score']
-        
-        exercise_progress.last_difficulty = data.get('lastDifficulty', exercise_progress.last_difficulty)
-        
-        if data.get('completedAt'):
-            exercise_progress.last_completed_at = data['completedAt']
-        if not exercise_progress.first_attempt_at:
-            exercise_progress.first_attempt_at = timezone.now()
-        
-        exercise_progress.save()
-        
-        # Add performance metrics if provided
-        if 'performanceMetrics' in data:
-            metrics = data['performanceMetrics']
-            PerformanceMetrics.objects.create(
-                exercise_progress=exercise_progress,
-                difficulty=metrics.get('difficulty', 'easy'),
-                score=metrics.get('score', 0),
-                missed_low_freq=metrics.get('missedLowFreq', 0),
-                similar_choice_errors=metrics.get('similarChoiceErrors', 0),
-                error_tags=metrics.get('errorTags', [])
+        now = timezone.now()
+        expressions, values = exercise_progress_changes(data, now)
+
+        with transaction.atomic():
+            module_progress, module_created = ModuleProgress.objects.get_or_create(
+                user=request.user,
+                module=module_name
             )
-        
-        # Update module progress
-        module_progress.last_accessed_at = timezone.now()
-        
-        # Calculate completion percentage
-        exercises = ExerciseProgress.objects.filter(module_progress=module_progress)
-        completed = exercises.filter(status='completed').count()
-        total = exercises.count()
-        module_progress.completion_percentage = int((completed / total * 100)) if total > 0 else 0
-        
-        module_progress.save()
-        
+
+            # Upsert: update in place, create only when the row is missing
+            exercises = ExerciseProgress.objects.filter(module_progress=module_progress)
+            if module_created or not exercises.filter(exercise_type=exercise_type).update(**expressions):
+                try:
+                    with transaction.atomic():
+                        ExerciseProgress.objects.create(
+                            module_progress=module_progress,
+                            exercise_type=exercise_type,
+                            **values
+                        )
+                except IntegrityError:
+                    # Created concurrently by another request
+                    exercises.filter(exercise_type=exercise_type).update(**expressions)
+            exercise_progress = exercises.get(exercise_type=exercise_type)
+
+            # Add performance metrics if provided
+            if 'performanceMetrics' in data:
+                metrics = data['performanceMetrics']
+                PerformanceMetrics.objects.create(
+                    exercise_progress=exercise_progress,
+                    difficulty=metrics.get('difficulty', 'easy'),
+                    score=metrics.get('score', 0),
+                    missed_low_freq=metrics.get('missedLowFreq', 0),
+                    similar_choice_errors=metrics.get('similarChoiceErrors', 0),
+                    error_tags=metrics.get('errorTags', [])
+                )
+
+            # Completion percentage from one conditional aggregate
+            counts = exercises.aggregate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(status='completed'))
+            )
+            total = counts['total']
+            module_progress.completion_percentage = int(counts['completed'] / total * 100) if total else 0
+            module_progress.last_accessed_at = now
+            module_progress.save(update_fields=['completion_percentage', 'last_accessed_at', 'updated_at'])
+
+        exercise_progress.recent_history = list(
+            exercise_progress.performance_history.order_by('-timestamp', '-id')[:HISTORY_LIMIT]
+        )
         serializer = ExerciseProgressSerializer(exercise_progress)
         return Response(serializer.data)
         
@@ -121,34 +198,224 @@ def update_exercise_progress(request, module_name, exercise_type):
         )
 
 
+# Attempts accepted per bulk submission
+BULK_ATTEMPTS_MAX = 200
+
+
+def last_given(attempts, field):
+    """Value of field in the latest attempt that has one"""
+    return next((a[field] for a in reversed(attempts) if a.get(field)), None)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_attempts(request):
+    """Record a batch of attempts across modules and exercises
+
+    Attempts are inserted with one bulk_create; each affected exercise
+    and module is then updated once. Attempts whose clientAttemptId was
+    already recorded are skipped (checked under a lock on the affected
+    exercises), so a batch can be safely resent, even concurrently.
+    Returns the updated progress of the affected modules.
+    """
+    attempts = request.data.get('attempts') if isinstance(request.data, dict) else None
+    if isinstance(attempts, list) and len(attempts) > BULK_ATTEMPTS_MAX:
+        return Response(
+            {'error': f'At most {BULK_ATTEMPTS_MAX} attempts per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    serializer = AttemptSerializer(data=attempts, many=True)
+    if not serializer.is_valid():
+        return Response(
+            {'error': 'Invalid attempts', 'details': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    keys = {(a['module'], a['exerciseType']) for a in serializer.validated_data}
+    module_names = {module for module, _ in keys}
+    now = timezone.now()
+
+    with transaction.atomic():
+        ModuleProgress.objects.bulk_create(
+            [ModuleProgress(user=request.user, module=module) for module in module_names],
+            ignore_conflicts=True
+        )
+        modules = {
+            m.module: m for m in ModuleProgress.objects.filter(user=request.user, module__in=module_names)
+        }
+        ExerciseProgress.objects.bulk_create(
+            [
+                ExerciseProgress(module_progress=modules[module], exercise_type=exercise_type, attempts=0)
+                for module, exercise_type in keys
+            ],
+            ignore_conflicts=True
+        )
+        # Lock the exercises before the duplicate check, so a concurrent resend
+        # waits for this batch and then sees its attempts as duplicates
+        exercises = {
+            (e.module_progress_id, e.exercise_type): e
+            for e in ExerciseProgress.objects.select_for_update().filter(
+                module_progress__in=list(modules.values())
+            ).order_by('pk')
+        }
+
+        # Skip attempts already recorded or repeated within the batch
+        seen = set(PerformanceMetrics.objects.filter(
+            exercise_progress__module_progress__user=request.user,
+            client_attempt_id__in=[a['clientAttemptId'] for a in serializer.validated_data]
+        ).values_list('client_attempt_id', flat=True))
+        by_key, duplicates = {}, []
+        for attempt in serializer.validated_data:
+            if attempt['clientAttemptId'] in seen:
+                duplicates.append(attempt['clientAttemptId'])
+                continue
+            seen.add(attempt['clientAttemptId'])
+            by_key.setdefault((attempt['module'], attempt['exerciseType']), []).append(attempt)
+
+        metrics = [
+            PerformanceMetrics(
+                exercise_progress=exercises[(modules[module].id, exercise_type)],
+                difficulty=a['difficulty'],
+                score=a['score'],
+                missed_low_freq=a['missedLowFreq'],
+                similar_choice_errors=a['similarChoiceErrors'],
+                error_tags=a['errorTags'],
+                client_attempt_id=a['clientAttemptId']
+            )
+            for (module, exercise_type), key_attempts in by_key.items()
+            for a in key_attempts
+        ]
+        PerformanceMetrics.objects.bulk_create(metrics)
+
+        # attempts is absolute, as in update_exercise_progress: the number of
+        # recorded attempts, never moved backwards
+        recorded_counts = dict(
+            PerformanceMetrics.objects.filter(
+                exercise_progress__in=[exercises[(modules[m].id, t)] for m, t in by_key]
+            ).values_list('exercise_progress').annotate(count=Count('id'))
+        )
+        for (module, exercise_type), key_attempts in by_key.items():
+            exercise = exercises[(modules[module].id, exercise_type)]
+            expressions, _ = exercise_progress_changes({
+                'status': last_given(key_attempts, 'status'),
+                'lastDifficulty': key_attempts[-1]['difficulty'],
+                'completedAt': last_given(key_attempts, 'completedAt'),
+                'score': key_attempts[-1]['score'],
+                'attempts': recorded_counts.get(exercise.pk, 0),
+            }, now)
+            best = max(a['score'] for a in key_attempts)
+            expressions['best_score'] = Greatest(Coalesce(F('best_score'), Value(best)), Value(best))
+            ExerciseProgress.objects.filter(pk=exercise.pk).update(**expressions)
+
+        # Completion for every touched module from one grouped aggregate
+        touched = {modules[module].id: modules[module] for module, _ in by_key}
+        if touched:
+            counts = ExerciseProgress.objects.filter(module_progress__in=list(touched)).values(
+                'module_progress'
+            ).annotate(total=Count('id'), completed=Count('id', filter=Q(status='completed')))
+            for row in counts:
+                module = touched[row['module_progress']]
+                module.completion_percentage = int(row['completed'] / row['total'] * 100) if row['total'] else 0
+                module.last_accessed_at = now
+                module.updated_at = now
+            ModuleProgress.objects.bulk_update(
+                list(touched.values()), ['completion_percentage', 'last_accessed_at', 'updated_at']
+            )
+
+    snapshot = with_progress_tree(ModuleProgress.objects.filter(pk__in=[m.pk for m in modules.values()]))
+    return Response({
+        'recorded': len(metrics),
+        'duplicates': duplicates,
+        'modules': ModuleProgressSerializer(snapshot, many=True).data
+    })
+
+
+# Page size for performance history (?limit=, capped at HISTORY_PAGE_MAX)
+HISTORY_PAGE_SIZE = 50
+HISTORY_PAGE_MAX = 200
+
+
+def encode_cursor(metric):
+    """Opaque keyset cursor for the (timestamp, id) position of a row"""
+    raw = f"{metric.timestamp.isoformat()}|{metric.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        parsed = parse_datetime(timestamp)
+        if parsed is None:
+            raise ValueError
+        return parsed, int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+
+def parse_bound(value, name):
+    """Datetime or date query parameter, made timezone-aware"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid {name}: expected an ISO date or datetime')
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_performance_history(request, module_name, exercise_type):
-    """Get performance history for an exercise"""
+    """Get performance history for an exercise, newest first, one page at a time
+
+    Query params: limit, cursor (next_cursor from the previous page),
+    since (inclusive) / until (exclusive) as ISO dates or datetimes, and
+    fields (comma-separated subset of the metric fields).
+    """
+    exercise_progress = get_object_or_404(
+        ExerciseProgress,
+        module_progress__user=request.user,
+        module_progress__module=module_name,
+        exercise_type=exercise_type
+    )
+
+    params = request.query_params
     try:
-        module_progress = get_object_or_404(
-            ModuleProgress,
-            user=request.user,
-            module=module_name
-        )
-        exercise_progress = get_object_or_404(
-            ExerciseProgress,
-            module_progress=module_progress,
-            exercise_type=exercise_type
-        )
-        
+        if not str(params.get('limit', HISTORY_PAGE_SIZE)).isdigit():
+            raise ValueError('Invalid limit: expected a positive integer')
+        limit = min(HISTORY_PAGE_MAX, max(1, int(params.get('limit', HISTORY_PAGE_SIZE))))
+        fields = [f for f in params.get('fields', '').split(',') if f] or None
+        unknown = set(fields or []) - set(PerformanceMetricsSerializer.Meta.fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        # Keyset pagination over (timestamp, id), served by the
+        # (exercise_progress, timestamp) index
         metrics = PerformanceMetrics.objects.filter(
             exercise_progress=exercise_progress
-        ).order_by('-timestamp')
-        
-        serializer = PerformanceMetricsSerializer(metrics, many=True)
-        return Response(serializer.data)
-        
-    except Exception as e:
-        return Response(
-            {'error': str(e)},
-            status=status.HTTP_404_NOT_FOUND
-        )
+        ).order_by('-timestamp', '-id')
+        if params.get('since'):
+            metrics = metrics.filter(timestamp__gte=parse_bound(params['since'], 'since'))
+        if params.get('until'):
+            metrics = metrics.filter(timestamp__lt=parse_bound(params['until'], 'until'))
+        if params.get('cursor'):
+            timestamp, pk = decode_cursor(params['cursor'])
+            metrics = metrics.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if fields:
+        metrics = metrics.only('id', 'timestamp', *fields)
+    page = list(metrics[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    serializer = PerformanceMetricsSerializer(page[:limit], many=True, fields=fields)
+
+    return Response({
+        'results': serializer.data,
+        'next_cursor': next_cursor
+    })
 
 
 @api_view(['DELETE'])
@@ -203,22 +470,8 @@ def get_due_srs_cards(request):
     })
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def update_srs_card(request, word_id):
-    """Update SRS card after review (SM-2 algorithm)"""
-    grade = request.data.get('grade', 3)  # 0-5 scale
-    
-    # Get or create SRS card
-    card, created = SRSCard.objects.get_or_create(
-        user=request.user,
-        word_id=word_id,
-        defaults={
-            'next_review': timezone.now()
-        }
-    )
-    
-    # SM-2 Algorithm Implementation
+def apply_sm2(card, grade, reviewed_at):
+    """Apply one SM-2 review (grade 0-5) to a card in memory"""
     if grade >= 3:  # Correct response
         if card.repetitions == 0:
             card.interval = 1
@@ -239,12 +492,106 @@ def update_srs_card(request, word_id):
     )
     
     # Set next review date
-    card.next_review = timezone.now() + timedelta(days=card.interval)
+    card.next_review = reviewed_at + timedelta(days=card.interval)
+    card.last_reviewed = reviewed_at
+    return card
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def update_srs_card(request, word_id):
+    """Update SRS card after review (SM-2 algorithm)"""
+    grade = request.data.get('grade', 3)  # 0-5 scale
+    
+    # Get or create SRS card
+    card, created = SRSCard.objects.get_or_create(
+        user=request.user,
+        word_id=word_id,
+        defaults={
+            'next_review': timezone.now()
+        }
+    )
+    
+    apply_sm2(card, grade, timezone.now())
     card.save()
     
     return Response(SRSCardSerializer(card).data)
 
 
+# Reviews accepted per session submission
+SRS_SESSION_MAX = 200
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def review_srs_session(request):
+    """Apply a whole review session of (word_id, grade, reviewed_at) results
+
+    Reviews are applied in reviewed_at order with the same SM-2 update as
+    update_srs_card, then new and existing cards are written with one
+    bulk_create and one bulk_update in a single transaction. Returns the
+    updated cards and the queue of cards now due.
+    """
+    reviews = request.data.get('reviews') if isinstance(request.data, dict) else None
+    if isinstance(reviews, list) and len(reviews) > SRS_SESSION_MAX:
+        return Response(
+            {'error': f'At most {SRS_SESSION_MAX} reviews per session'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    serializer = SRSReviewSerializer(data=reviews, many=True)
+    if not serializer.is_valid():
+        return Response(
+            {'error': 'Invalid reviews', 'details': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    now = timezone.now()
+    reviews = sorted(serializer.validated_data, key=lambda r: r.get('reviewed_at') or now)
+
+    try:
+        with transaction.atomic():
+            cards = {
+                card.word_id: card
+                for card in SRSCard.objects.select_for_update().filter(
+                    user=request.user,
+                    word_id__in={r['word_id'] for r in reviews}
+                )
+            }
+            existing = set(cards)
+            for review in reviews:
+                card = cards.get(review['word_id'])
+                if card is None:
+                    card = cards[review['word_id']] = SRSCard(
+                        user=request.user,
+                        word_id=review['word_id'],
+                        next_review=now
+                    )
+                apply_sm2(card, review['grade'], review.get('reviewed_at') or now)
+
+            SRSCard.objects.bulk_create([c for w, c in cards.items() if w not in existing])
+            SRSCard.objects.bulk_update(
+                [c for w, c in cards.items() if w in existing],
+                ['repetitions', 'easiness_factor', 'interval', 'next_review', 'last_reviewed']
+            )
+    except IntegrityError:
+        # A card was created by a concurrent request; the session can be resent
+        return Response(
+            {'error': 'Conflicting update, please retry'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    due_cards = list(SRSCard.objects.filter(
+        user=request.user,
+        next_review__lte=now
+    ).order_by('next_review'))
+
+    return Response({
+        'cards': SRSCardSerializer(list(cards.values()), many=True).data,
+        'due_cards': SRSCardSerializer(due_cards, many=True).data,
+        'due_count': len(due_cards)
+    })
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def reset_srs_card(request, word_id):
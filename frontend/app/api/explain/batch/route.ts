@@ -0,0 +1,26 @@
+/**
+ * Batch explanations for end-of-quiz review
+ * Proxies to the FastAPI AI service /explain/batch endpoint
+ */
+
+import { NextRequest, NextResponse } from "next/server";
+import { getExplanations, ExplainRequest } from "@/lib/api/ai-service";
+import { callerFromRequest } from "@/lib/api/caller";
+
+export async function POST(req: NextRequest) {
+  try {
+    const body = await req.json();
+
+    const { items } = body as { items: ExplainRequest[] };
+
+    const response = await getExplanations(items, callerFromRequest(req));
+
+    return NextResponse.json({ results: response.results });
+  } catch (error: any) {
+    console.error("Batch explanation API error:", error);
+    return NextResponse.json(
+      { error: error.message || "Failed to generate explanations" },
+      { status: 500 }
+    );
+  }
+}
@@ -54,6 +54,7 @@
 
 import { NextRequest, NextResponse } from "next/server";
 import { getExplanation } from "@/lib/api/ai-service";
+import { callerFromRequest } from "@/lib/api/caller";
 
 export async function POST(req: NextRequest) {
   try {
@@ -67,12 +68,15 @@ export async function POST(req: NextRequest) {
     };
 
     // Call AI service instead of OpenAI directly
-    const response = await getExplanation({
-      mode,
-      word,
-      correct,
-      selected,
-    });
+    const response = await getExplanation(
+      {
+        mode,
+        word,
+        correct,
+        selected,
+      },
+      callerFromRequest(req)
+    );
 
     return NextResponse.json({ explanation: response.explanation });
   } catch (error: any) {
@@ -18,6 +18,18 @@ interface ParsedExplanation {
   timePressureTip: string;
 }
 
+// Send the access token so the explain route can identify the student
+function authHeaders(): Record<string, string> {
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  try {
+    const access = JSON.parse(localStorage.getItem("tokens") || "{}").access;
+    if (access) headers.Authorization = `Bearer ${access}`;
+  } catch {
+    // No usable token; the route falls back to the client IP
+  }
+  return headers;
+}
+
 export default function AIExplanation({
   mode,
   word,
@@ -66,7 +78,7 @@ export default function AIExplanation({
         setErr("");
         const res = await fetch("/api/explain", {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
+          headers: authHeaders(),
           body: JSON.stringify({ mode, word, correct, selected }),
         });
         const data = await res.json();
@@ -4,6 +4,30 @@
  */
 
 const AI_SERVICE_URL = process.env.NEXT_PUBLIC_AI_SERVICE_URL || 'http://localhost:8001';
+// Server-only: lets the AI service trust the caller identity we forward
+const AI_SERVICE_SHARED_SECRET = process.env.AI_SERVICE_SHARED_SECRET || '';
+
+// The end user a server route is calling on behalf of
+export interface AICaller {
+  userId?: string | null;
+  ip?: string | null;
+}
+
+function aiServiceHeaders(caller?: AICaller): Record<string, string> {
+  const headers: Record<string, string> = {
+    'Content-Type': 'application/json',
+  };
+  if (AI_SERVICE_SHARED_SECRET) {
+    headers['X-Service-Token'] = AI_SERVICE_SHARED_SECRET;
+  }
+  if (caller?.userId) {
+    headers['X-User-Id'] = caller.userId;
+  }
+  if (caller?.ip) {
+    headers['X-Forwarded-For'] = caller.ip;
+  }
+  return headers;
+}
 
 // Types
 export interface ExplainRequest {
@@ -17,6 +41,16 @@ export interface ExplainResponse {
   explanation: string;
 }
 
+export interface ExplainBatchItem {
+  ok: boolean;
+  explanation?: string | null;
+  error?: string | null;
+}
+
+export interface ExplainBatchResponse {
+  results: ExplainBatchItem[];
+}
+
 export interface TipsRequest {
   score: number;
   missedLowFreq: number;
@@ -56,13 +90,12 @@ export interface ConfusablesResponse {
 
 // API Functions
 export async function getExplanation(
-  request: ExplainRequest
+  request: ExplainRequest,
+  caller?: AICaller
 ): Promise<ExplainResponse> {
   const response = await fetch(`${AI_SERVICE_URL}/explain`, {
     method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
+    headers: aiServiceHeaders(caller),
     body: JSON.stringify(request),
   });
 
@@ -73,14 +106,30 @@ export async function getExplanation(
   return response.json();
 }
 
+export async function getExplanations(
+  items: ExplainRequest[],
+  caller?: AICaller
+): Promise<ExplainBatchResponse> {
+  const response = await fetch(`${AI_SERVICE_URL}/explain/batch`, {
+    method: 'POST',
+    headers: aiServiceHeaders(caller),
+    body: JSON.stringify({ items }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`AI Service error: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
 export async function getTips(
-  request: TipsRequest
+  request: TipsRequest,
+  caller?: AICaller
 ): Promise<TipsResponse> {
   const response = await fetch(`${AI_SERVICE_URL}/tips`, {
     method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
+    headers: aiServiceHeaders(caller),
     body: JSON.stringify(request),
   });
 
@@ -92,13 +141,12 @@ export async function getTips(
 }
 
 export async function redefineWord(
-  request: RedefineRequest
+  request: RedefineRequest,
+  caller?: AICaller
 ): Promise<RedefineResponse> {
   const response = await fetch(`${AI_SERVICE_URL}/redefine`, {
     method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
+    headers: aiServiceHeaders(caller),
     body: JSON.stringify(request),
   });
 
@@ -110,13 +158,12 @@ export async function redefineWord(
 }
 
 export async function getConfusables(
-  request: ConfusablesRequest
+  request: ConfusablesRequest,
+  caller?: AICaller
 ): Promise<ConfusablesResponse> {
   const response = await fetch(`${AI_SERVICE_URL}/confusables`, {
     method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
+    headers: aiServiceHeaders(caller),
     body: JSON.stringify(request),
   });
 
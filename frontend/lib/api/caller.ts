@@ -0,0 +1,74 @@
+/**
+ * Caller identity for server routes that proxy to the AI service
+ * Server-only: verifies the backend's access token (SIMPLE_JWT, HS256)
+ */
+
+import { createHmac, timingSafeEqual } from "crypto";
+import { NextRequest } from "next/server";
+import type { AICaller } from "@/lib/api/ai-service";
+
+// Must match the backend's SIMPLE_JWT signing key (Django SECRET_KEY by default)
+const JWT_SIGNING_KEY = process.env.JWT_SIGNING_KEY || "";
+
+function base64UrlDecode(value: string): Buffer {
+  return Buffer.from(value.replace(/-/g, "+").replace(/_/g, "/"), "base64");
+}
+
+// Return the user_id claim of a valid, unexpired access token, else null
+function verifiedUserId(token: string): string | null {
+  if (!JWT_SIGNING_KEY) return null;
+
+  const parts = token.split(".");
+  if (parts.length !== 3) return null;
+  const [header, payload, signature] = parts;
+
+  try {
+    const { alg } = JSON.parse(base64UrlDecode(header).toString("utf8"));
+    if (alg !== "HS256") return null;
+
+    const expected = createHmac("sha256", JWT_SIGNING_KEY)
+      .update(`${header}.${payload}`)
+      .digest();
+    const actual = base64UrlDecode(signature);
+    if (actual.length !== expected.length || !timingSafeEqual(actual, expected)) {
+      return null;
+    }
+
+    const claims = JSON.parse(base64UrlDecode(payload).toString("utf8"));
+    if (typeof claims.exp === "number" && claims.exp * 1000 < Date.now()) {
+      return null;
+    }
+    return claims.user_id != null ? String(claims.user_id) : null;
+  } catch {
+    return null;
+  }
+}
+
+// Proxies in front of this server that append to X-Forwarded-For (0: none)
+const TRUSTED_PROXY_HOPS = parseInt(process.env.TRUSTED_PROXY_HOPS || "0", 10) || 0;
+
+// The client address as seen by our own outermost proxy: the entry
+// TRUSTED_PROXY_HOPS from the right. Left-hand entries come from the
+// browser and are never used. With no trusted proxy the route cannot see
+// the socket peer, so no address is forwarded and the AI service keys
+// anonymous callers on this server instead.
+function clientAddress(req: NextRequest): string | null {
+  if (TRUSTED_PROXY_HOPS < 1) return null;
+  const entries = (req.headers.get("x-forwarded-for") || "")
+    .split(",")
+    .map((entry) => entry.trim())
+    .filter(Boolean);
+  return entries.length >= TRUSTED_PROXY_HOPS
+    ? entries[entries.length - TRUSTED_PROXY_HOPS]
+    : null;
+}
+
+export function callerFromRequest(req: NextRequest): AICaller {
+  const auth = req.headers.get("authorization") || "";
+  const token = auth.startsWith("Bearer ") ? auth.slice(7).trim() : "";
+
+  return {
+    userId: token ? verifiedUserId(token) : null,
+    ip: clientAddress(req),
+  };
+}
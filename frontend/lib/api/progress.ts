@@ -103,11 +103,58 @@ export async function updateExerciseProgress(
   });
 }
 
+export interface PerformanceHistoryPage {
+  results: Partial<PerformanceMetrics>[];
+  next_cursor: string | null;
+}
+
+// Newest first; pass next_cursor back as `cursor` for the following page
 export async function getPerformanceHistory(
   module: string,
-  exercise: string
-): Promise<PerformanceMetrics[]> {
-  return fetchWithAuth(`${API_URL}/progress/${module}/${exercise}/history/`);
+  exercise: string,
+  options: {
+    cursor?: string;
+    limit?: number;
+    since?: string;
+    until?: string;
+    fields?: (keyof PerformanceMetrics | 'id')[];
+  } = {}
+): Promise<PerformanceHistoryPage> {
+  const params = new URLSearchParams();
+  if (options.cursor) params.set('cursor', options.cursor);
+  if (options.limit) params.set('limit', String(options.limit));
+  if (options.since) params.set('since', options.since);
+  if (options.until) params.set('until', options.until);
+  if (options.fields?.length) params.set('fields', options.fields.join(','));
+  const query = params.toString();
+  return fetchWithAuth(
+    `${API_URL}/progress/${module}/${exercise}/history/${query ? `?${query}` : ''}`
+  );
+}
+
+export interface AttemptSubmission {
+  clientAttemptId: string; // unique per attempt; resent attempts are ignored
+  module: string;
+  exerciseType: string;
+  difficulty: 'easy' | 'medium' | 'hard';
+  score: number;
+  missedLowFreq?: number;
+  similarChoiceErrors?: number;
+  errorTags?: string[];
+  status?: string;
+  completedAt?: string;
+}
+
+// Record up to 200 attempts in one request; safe to retry with the same IDs
+export async function submitAttempts(attempts: AttemptSubmission[]): Promise<{
+  recorded: number;
+  duplicates: string[];
+  modules: ModuleProgress[];
+}> {
+  return fetchWithAuth(`${API_URL}/progress/attempts/bulk/`, {
+    method: 'POST',
+    body: JSON.stringify({ attempts }),
+  });
 }
 
 export async function resetProgress(module?: string): Promise<{ message: string }> {
@@ -159,6 +206,20 @@ export async function updateSRSCard(
   });
 }
 
+// Submit a whole review session; returns the updated cards and the due queue
+export async function reviewSRSSession(
+  reviews: { word_id: number; grade: number; reviewed_at?: string }[]
+): Promise<{
+  cards: SRSCard[];
+  due_cards: SRSCard[];
+  due_count: number;
+}> {
+  return fetchWithAuth(`${API_URL}/progress/srs/review/`, {
+    method: 'POST',
+    body: JSON.stringify({ reviews }),
+  });
+}
+
 export async function resetSRSCard(wordId: number): Promise<{ message: string }> {
   return fetchWithAuth(`${API_URL}/progress/srs/${wordId}/reset/`, {
     method: 'DELETE',